@@ -0,0 +1,53 @@
+"""Сравнение сводной таблицы актуальных квартир с прежней реализацией через перекрёстное соединение
+
+Запуск: python -m benchmarks.bench_active_objects_pivot
+"""
+
+import pandas as pd
+
+from benchmarks.common import load_prepared_export, timer
+from config import config
+from src.aggregation.aggregator import DataAggregator
+from src.processing.feature_engineering import FeaturesBuilder
+
+
+def legacy_active_objects_pivot(df: pd.DataFrame, dates_df: pd.DataFrame) -> pd.DataFrame:
+    """Прежняя реализация: перекрёстное соединение дат и строк с сравнением месяца и дня"""
+
+    cross_table = pd.merge(dates_df, df[["gp", "actualized_at"]], how="cross")
+
+    filtered_df = cross_table[
+        (cross_table["actualized_at"].dt.month == cross_table["date"].dt.month)
+        & (cross_table["actualized_at"].dt.day == cross_table["date"].dt.day)
+    ]
+
+    pivot = filtered_df.groupby(["date", "gp"]).size().reset_index(name="actual_count")
+
+    pivot["date"] = pivot["date"].dt.strftime("%d.%m.%Y")
+    pivot = pivot.rename(columns={"date": "Дата", "gp": "Корпус", "actual_count": "Кол-во активных квартир"})
+
+    return pivot
+
+
+def main() -> None:
+    df = load_prepared_export()
+    dates_df = FeaturesBuilder.create_date_range(start_date=config.START_DATE, end_date=config.END_DATE)
+    print(f"Строк: {len(df)}, дат: {len(dates_df)}")
+
+    results = {}
+
+    for scale in (1, 10):
+        scaled = pd.concat([df] * scale, ignore_index=True)
+
+        with timer(f"x{scale} перекрёстное соединение", results):
+            expected = legacy_active_objects_pivot(scaled, dates_df)
+
+        with timer(f"x{scale} группировка по дню", results):
+            actual = DataAggregator.create_active_objects_pivot(scaled, dates_df)
+
+        pd.testing.assert_frame_equal(actual, expected)
+        print(f"x{scale}: результаты совпадают ({len(actual)} строк)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""Сравнение разбора дат с прежней реализацией format="mixed"
+
+Запуск: python -m benchmarks.bench_cast_dates
+"""
+
+import pandas as pd
+
+from benchmarks.common import load_raw_export, timer
+from config import config
+from src.processing.preprocessor import DataPreprocessor
+
+
+def legacy_cast_dates(df: pd.DataFrame, columns: list[str]) -> pd.DataFrame:
+    """Прежняя реализация: поэлементный разбор в режиме mixed"""
+
+    for column in columns:
+        df[column] = pd.to_datetime(df[column], format="mixed", utc=True)
+
+    return df
+
+
+def main() -> None:
+    raw = load_raw_export()[config.DATES_COLUMNS]
+    results = {}
+
+    for scale in (1, 100):
+        scaled = pd.concat([raw] * scale, ignore_index=True)
+        print(f"Строк: {len(scaled)}")
+
+        with timer(f"x{scale} mixed", results):
+            expected = legacy_cast_dates(scaled.copy(), config.DATES_COLUMNS)
+
+        with timer(f"x{scale} преобладающий формат", results):
+            actual = DataPreprocessor._cast_dates(scaled.copy(), config.DATES_COLUMNS)
+
+        pd.testing.assert_frame_equal(actual, expected)
+        print(f"x{scale}: результаты совпадают, ускорение {results[f'x{scale} mixed'] / results[f'x{scale} преобладающий формат']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
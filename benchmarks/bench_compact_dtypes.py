@@ -0,0 +1,38 @@
+"""Сравнение занимаемой памяти подготовленных данных в обычном и компактном режимах типов
+
+Запуск: python -m benchmarks.bench_compact_dtypes
+"""
+
+import pandas as pd
+
+from benchmarks.common import load_raw_export, timer
+from src.processing.preprocessor import DataPreprocessor
+
+
+def bytes_per_row(df: pd.DataFrame) -> float:
+    """Занимаемая таблицей память в байтах на строку"""
+
+    return df.memory_usage(deep=True).sum() / len(df)
+
+
+def main() -> None:
+    raw = load_raw_export()
+    results = {}
+
+    # x1 - одна выгрузка, адреса уникальны; x10 - история срезов, в которой повторяются те же квартиры
+    for scale in (1, 10):
+        scaled = pd.concat([raw] * scale, ignore_index=True)
+        print(f"Строк: {len(scaled)}")
+
+        with timer(f"x{scale} обычные типы", results):
+            prepared = DataPreprocessor(compact=False).prepare_data(scaled.copy())
+
+        with timer(f"x{scale} компактные типы", results):
+            compact = DataPreprocessor(compact=True).prepare_data(scaled.copy())
+
+        before, after = bytes_per_row(prepared), bytes_per_row(compact)
+        print(f"x{scale}: {before:.0f} -> {after:.0f} байт на строку, сокращение {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""Сравнение извлечения корпуса из адреса с прежней построчной реализацией
+
+Запуск: python -m benchmarks.bench_gp_extraction
+"""
+
+import pandas as pd
+
+from benchmarks.common import load_raw_export, timer
+from src.processing.preprocessor import DataPreprocessor
+
+
+def main() -> None:
+    addresses = load_raw_export()["address"]
+    results = {}
+
+    # Адреса выгрузок повторяются между срезами: масштабирование повторяет те же адреса
+    for scale in (1, 100):
+        scaled = pd.concat([addresses] * scale, ignore_index=True)
+        print(f"Строк: {len(scaled)}, уникальных адресов: {scaled.nunique()}")
+
+        with timer(f"x{scale} построчно", results):
+            expected = scaled.map(DataPreprocessor._extract_gp_from_address)
+
+        with timer(f"x{scale} по уникальным адресам", results):
+            actual = DataPreprocessor._extract_gp_from_addresses(scaled)
+
+        pd.testing.assert_series_equal(actual.fillna("-"), expected.fillna("-"), check_names=False)
+        print(f"x{scale}: результаты совпадают, ускорение {results[f'x{scale} построчно'] / results[f'x{scale} по уникальным адресам']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
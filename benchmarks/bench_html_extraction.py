@@ -0,0 +1,80 @@
+"""Сравнение быстрого разбора страницы парсера с разбором полного дерева
+
+Запуск: python -m benchmarks.bench_html_extraction
+"""
+
+from benchmarks.common import timer
+from config import config
+from src.parsing.parser import APARTMENT_CLASSES, TDSKParser
+
+APARTMENT_HTML = """
+<div class="{classes}">
+    <div class="search-result__object">
+        <div class="search-result__object-top">1-комнатная квартира</div>
+        <div class="search-result__object-bottom">ул. Петра Ершова, д. 9, ГП-7.4</div>
+    </div>
+    <a class="search-result__link" href="/apartments/{advert_id}/" data-id="{advert_id}" data-floor="14"
+       data-rooms="1" data-number="275" data-price="4 150 000"><img src="/plan.png" alt=""></a>
+    <div class="search-result__td square">41,1</div>
+    <div class="search-result__td">5</div>
+    <div class="search-result__td">14</div>
+    <div class="search-result__td"><span>4 150 000 ₽</span></div>
+</div>
+"""
+
+# Меню, фильтры и скрипты страницы, не относящиеся к карточкам квартир
+FILLER_HTML = (
+    '<div class="menu">'
+    + "".join(f'<ul><li><a href="/p{i}">Пункт {i}</a></li><li><span>Текст {i}</span></li></ul>' for i in range(400))
+    + "</div><script>var config = {};</script>"
+    + "".join(f'<select><option value="{i}">Вариант {i}</option></select>' for i in range(300))
+)
+
+
+def make_page(count: int = 20) -> str:
+    """Формирует страницу поиска квартир с count карточками, из них каждая пятая - акционная"""
+
+    items = "".join(
+        APARTMENT_HTML.format(classes=APARTMENT_CLASSES[index % 5 != 0], advert_id=330_000 + index)
+        for index in range(count)
+    )
+
+    return (
+        f"<html><head>{FILLER_HTML}</head><body>"
+        f'<span class="search-result__count-value">2571</span><div class="search-result__list">{items}</div>'
+        f"{FILLER_HTML}</body></html>"
+    )
+
+
+def extract(html: str) -> list[dict]:
+    """Разбирает страницу в записи квартир без полей, зависящих от времени запуска"""
+
+    records = [TDSKParser._parse_apartments_element(apartment) for apartment in TDSKParser._find_apartments(html)]
+
+    return [
+        {key: value for key, value in record.items() if key not in ("id", "published_at", "actualized_at")}
+        for record in records
+    ]
+
+
+def main() -> None:
+    html = make_page()
+    pages = 20
+    results = {}
+
+    print(f"Размер страницы: {len(html) // 1024} КБ, страниц: {pages}")
+
+    config.PARSER_FAST_HTML = False
+    with timer("полное дерево", results):
+        expected = [extract(html) for _ in range(pages)]
+
+    config.PARSER_FAST_HTML = True
+    with timer("быстрый разбор", results):
+        actual = [extract(html) for _ in range(pages)]
+
+    assert actual == expected
+    print(f"Результаты совпадают, ускорение {results['полное дерево'] / results['быстрый разбор']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
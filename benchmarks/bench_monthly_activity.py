@@ -0,0 +1,66 @@
+"""Сравнение признаков месячной активности с прежней реализацией на строковых ключах
+
+Запуск: python -m benchmarks.bench_monthly_activity
+"""
+
+import tracemalloc
+import warnings
+
+import pandas as pd
+
+from benchmarks.common import load_prepared_export, timer
+from src.processing.feature_engineering import FeaturesBuilder
+
+
+def legacy_monthly_activity_features(df: pd.DataFrame) -> pd.DataFrame:
+    """Прежняя реализация: строка на каждую строку таблицы, группировка по периоду и строке"""
+
+    features = pd.DataFrame()
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", UserWarning)
+        features["month"] = df["actualized_at"].dt.to_period("M")
+
+    features["room_count"] = df["room_count"].astype(str) + "-комн."
+
+    features = features.groupby(["month", "room_count"]).size().reset_index(name="count")
+
+    return features.pivot(index="month", columns="room_count", values="count").fillna(0)
+
+
+def peak_memory(func, *args) -> float:
+    """Пиковое потребление памяти вызовом в мегабайтах"""
+
+    tracemalloc.start()
+    func(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return peak / 2**20
+
+
+def main() -> None:
+    df = load_prepared_export()
+    results = {}
+
+    for scale in (1, 400):
+        scaled = pd.concat([df] * scale, ignore_index=True)
+        print(f"Строк: {len(scaled)}")
+
+        with timer(f"x{scale} строковые ключи", results):
+            expected = legacy_monthly_activity_features(scaled)
+
+        with timer(f"x{scale} целочисленные ключи", results):
+            actual = FeaturesBuilder.create_monthly_activity_features(scaled)
+
+        pd.testing.assert_frame_equal(actual, expected)
+        print(f"x{scale}: результаты совпадают, ускорение {results[f'x{scale} строковые ключи'] / results[f'x{scale} целочисленные ключи']:.1f}x")
+
+        print(
+            f"x{scale}: пиковая память {peak_memory(legacy_monthly_activity_features, scaled):.1f} МБ "
+            f"-> {peak_memory(FeaturesBuilder.create_monthly_activity_features, scaled):.1f} МБ"
+        )
+
+
+if __name__ == "__main__":
+    main()
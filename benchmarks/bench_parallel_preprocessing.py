@@ -0,0 +1,34 @@
+"""Сравнение обработки данных в текущем процессе и на пуле процессов
+
+Запуск: python -m benchmarks.bench_parallel_preprocessing
+"""
+
+import os
+
+import pandas as pd
+
+from benchmarks.common import load_raw_export, timer
+from src.processing.preprocessor import DataPreprocessor
+
+
+def main() -> None:
+    raw = load_raw_export()
+    workers = os.cpu_count() or 1
+    results = {}
+
+    for scale in (100, 400):
+        scaled = pd.concat([raw] * scale, ignore_index=True)
+        print(f"Строк: {len(scaled)}, процессов: {workers}")
+
+        with timer(f"x{scale} один процесс", results):
+            expected = DataPreprocessor(workers=1).prepare_data(scaled.copy())
+
+        with timer(f"x{scale} пул процессов", results):
+            actual = DataPreprocessor(workers=workers).prepare_data(scaled.copy())
+
+        pd.testing.assert_frame_equal(actual, expected)
+        print(f"x{scale}: результаты совпадают, ускорение {results[f'x{scale} один процесс'] / results[f'x{scale} пул процессов']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
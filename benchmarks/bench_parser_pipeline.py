@@ -0,0 +1,62 @@
+"""Сравнение обхода сайта: последовательно, с параллельной загрузкой и с разбором страниц на пуле процессов
+
+Сеть имитируется задержкой ответа, страницы синтетические
+
+Запуск: python -m benchmarks.bench_parser_pipeline
+"""
+
+import os
+import time
+from types import SimpleNamespace
+
+from benchmarks.bench_html_extraction import make_page
+from benchmarks.common import timer
+from config import config
+from src.parsing.parser import TDSKParser
+
+LATENCY = 0.1
+PAGES = 40
+PAGE_SIZE = 20
+
+
+class SlowSession:
+    """Сессия, отвечающая синтетической страницей с задержкой сети"""
+
+    def __init__(self):
+        self.page = make_page(count=PAGE_SIZE).replace("2571", str(PAGES * PAGE_SIZE))
+
+    def get(self, url, params=None):
+        time.sleep(LATENCY)
+        return SimpleNamespace(text=self.page)
+
+
+def crawl(max_in_flight: int, parse_workers: int) -> int:
+    """Обходит сайт с заданными настройками, возвращая число квартир"""
+
+    config.PARSER_MAX_IN_FLIGHT = max_in_flight
+    config.PARSER_PARSE_WORKERS = parse_workers
+
+    parser = TDSKParser()
+    parser.session = SlowSession()
+
+    return len(parser.parse_apartments())
+
+
+def main() -> None:
+    # Пул процессов запускается и на одном ядре, чтобы замер показывал накладные расходы конвейера
+    workers = max(os.cpu_count() or 1, 2)
+    results = {}
+
+    print(f"Страниц: {PAGES}, задержка ответа: {LATENCY * 1000:.0f} мс, ядер: {os.cpu_count()}")
+
+    for max_in_flight, parse_workers in ((1, 1), (8, 1), (8, workers)):
+        title = f"загрузка {max_in_flight}, процессов разбора {parse_workers}"
+
+        with timer(title, results):
+            count = crawl(max_in_flight=max_in_flight, parse_workers=parse_workers)
+
+        assert count == PAGES * PAGE_SIZE
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Сравнение сборки таблицы спарсенных квартир с прежней построчной вставкой
+
+Запуск: python -m benchmarks.bench_parser_records
+"""
+
+import pandas as pd
+from bs4 import BeautifulSoup
+
+from benchmarks.common import timer
+from config import config
+from src.parsing.parser import TDSKParser
+
+APARTMENT_HTML = """
+<div class="search-result__list-item list-item">
+    <a class="search-result__link" data-id="330489" data-floor="14" data-rooms="1" data-number="275"
+       data-price="4 150 000"></a>
+    <div class="search-result__object-bottom">ул. Петра Ершова, д. 9, ГП-7.4</div>
+    <div class="search-result__td square">41,1</div>
+    <div class="search-result__object-top">1-комнатная квартира</div>
+    <div class="search-result__td">Подъезд 5</div>
+    <div class="search-result__td">Доп информация</div>
+</div>
+"""
+
+
+def process_apartments_legacy(parser: TDSKParser, apartments: list, df: pd.DataFrame) -> pd.DataFrame:
+    """Прежняя реализация: вставка каждой квартиры строкой в таблицу"""
+
+    for apartment in apartments:
+        df.loc[len(df)] = parser._parse_apartments_element(apartment=apartment)
+
+    return df
+
+
+def main() -> None:
+    parser = TDSKParser()
+    apartment = BeautifulSoup(APARTMENT_HTML, "html.parser").find("div")
+    results = {}
+
+    # Прежняя реализация квадратична и на 10k квартир работает минуту, поэтому замеряется до 3k
+    for count in (1_000, 3_000, 10_000, 100_000):
+        apartments = [apartment] * count
+
+        with timer(f"{count} списком записей", results):
+            actual = pd.DataFrame.from_records(
+                parser._process_apartments(apartments=apartments), columns=config.BASE_COLUMNS
+            )
+
+        print(f"{count}: {results[f'{count} списком записей'] / count * 1e6:.1f} мкс на квартиру")
+
+        if count > 3_000:
+            continue
+
+        with timer(f"{count} построчно", results):
+            expected = process_apartments_legacy(parser, apartments, pd.DataFrame(columns=config.BASE_COLUMNS))
+
+        print(f"{count}: {results[f'{count} построчно'] / count * 1e6:.1f} мкс на квартиру построчно")
+
+        columns = [column for column in config.BASE_COLUMNS if column not in ("id", "published_at", "actualized_at")]
+        pd.testing.assert_frame_equal(actual[columns], expected[columns])
+        assert actual.dtypes.equals(expected.dtypes)
+        print(f"{count}: результаты совпадают, ускорение {results[f'{count} построчно'] / results[f'{count} списком записей']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+from config import config
+from src.adapters.csv_repository import CSVRepository
+from src.processing.preprocessor import DataPreprocessor
+from src.utils.cache import results_cache
+
+# Бенчмарки замеряют сами расчёты, а не чтение результатов из кэша
+results_cache.enabled = False
+
+
+def load_raw_export() -> pd.DataFrame:
+    """Загружает сырую выгрузку из RAW_DATA_PATH"""
+
+    return CSVRepository.load(file_path=config.RAW_DATA_PATH, separator=config.SEPARATOR)
+
+
+def load_prepared_export() -> pd.DataFrame:
+    """Загружает и обрабатывает сырую выгрузку из RAW_DATA_PATH"""
+
+    return DataPreprocessor().prepare_data(load_raw_export())
+
+
+@contextmanager
+def timer(title: str, results: dict):
+    """Замеряет время выполнения блока и сохраняет его в results"""
+
+    start = time.perf_counter()
+    yield
+    results[title] = time.perf_counter() - start
+    print(f"{title}: {results[title] * 1000:.1f} мс")
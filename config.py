@@ -15,13 +15,26 @@ class Config:
     SEPARATOR = "\t"
 
     # Список стратегий
-    STRATEGY_LIST = ["main", "parse"]
+    STRATEGY_LIST = ["main", "parse", "snapshots", "prepare"]
 
     # Аргументы функции сохранения
+    # storage - формат хранения таблицы: "csv" или "columnar" (Parquet либо numpy-файлы колонок)
+    # compression - сжатие CSV: None, "gzip", "zstd" или "xz"
     SAVE_ARGS = namedtuple(
-        "SAVE_ARGS", ["save_path", "file_name", "save_date"]
+        "SAVE_ARGS",
+        ["save_path", "file_name", "save_date", "storage", "compression"],
+        defaults=["csv", None],
     )
 
+    # Формат хранения промежуточных данных
+    PREPARED_DATA_STORAGE = "csv"
+    PARSED_DATA_STORAGE = "csv"
+    MERGED_DATA_STORAGE = "csv"
+
+    # Сжатие срезов спарсенных данных и сцепленных историй, сжатые файлы читаются прозрачно
+    PARSED_DATA_COMPRESSION = None
+    MERGED_DATA_COMPRESSION = None
+
     # Директории к данным
     RAW_DATA_PATH = (
         BASE_DIR
@@ -32,6 +45,37 @@ class Config:
     MERGED_DATA_PATH = BASE_DIR / "data" / "merged_data"
     PARSED_DATA_PATH = BASE_DIR / "data" / "parsed_data"
     PREPARED_DATA_PATH = BASE_DIR / "data" / "prepared_data"
+    PIVOT_STORE_PATH = BASE_DIR / "data" / "pivot_store"
+    LISTING_STORE_PATH = BASE_DIR / "data" / "listing_store"
+    PREPARED_CACHE_PATH = BASE_DIR / "data" / "prepared_cache"
+    CACHE_DIR = BASE_DIR / "data" / "cache"
+
+    # Сохранение объединённых данных в MERGED_DATA_PATH в дополнение к хранилищу квартир
+    SAVE_MERGED_DUMPS = False
+
+    # Размер блока для потокового объединения старых и новых данных, None - объединение в памяти
+    MERGE_CHUNK_SIZE = None
+
+    # Размер блока потоковой обработки сырой выгрузки (стратегия prepare)
+    PREPROCESSING_CHUNK_SIZE = 100_000
+
+    # Число процессов обработки данных (1 - в текущем процессе) и минимальный размер части таблицы на процесс
+    PREPROCESSING_WORKERS = 1
+    PREPROCESSING_MIN_PARTITION_ROWS = 50_000
+
+    # Фоновая запись таблиц и графиков: расчёты продолжаются, пока файлы пишутся на диск
+    ASYNC_SAVES = False
+    WRITER_WORKERS = 1
+    WRITER_QUEUE_SIZE = 8
+
+    # Кэш подготовленных данных: сырая выгрузка не обрабатывается повторно, пока не изменились она,
+    # настройки или код обработки
+    PREPARED_CACHE_ENABLED = True
+
+    # Кэш результатов построения признаков и агрегаций: лимиты размера в байтах для памяти и диска
+    CACHE_ENABLED = True
+    CACHE_MEMORY_LIMIT = 256 * 2**20
+    CACHE_DISK_LIMIT = 2**30
 
     # Настройки парсера
     PARSER_URL = (
@@ -41,8 +85,39 @@ class Config:
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
     }
 
+    # Число одновременно загружаемых страниц (1 - последовательный обход)
+    PARSER_MAX_IN_FLIGHT = 4
+
+    # Число процессов разбора страниц (1 - разбор в потоках загрузки)
+    PARSER_PARSE_WORKERS = 1
+
+    # Быстрый разбор страниц: дерево строится только для карточек квартир, при неудаче страница разбирается целиком
+    PARSER_FAST_HTML = True
+
+    # Размер блока потокового парсинга: квартиры обрабатываются и дописываются в файл по мере загрузки страниц
+    # (None - таблица собирается и обрабатывается целиком после обхода сайта)
+    PARSER_BATCH_SIZE = None
+
     # Колонки типов
     DATES_COLUMNS = ["published_at", "actualized_at"]
+
+    # Компактные типы подготовленных данных: категории для повторяющихся строк и минимальные типы для целых чисел
+    COMPACT_DTYPES = False
+    CATEGORICAL_COLUMNS = ["domain", "developer", "gp", "address", "description"]
+    CATEGORY_MAX_UNIQUE_RATIO = 0.5
+    # Дробные колонки (площадь) не сужаются: float32 меняет значения и их запись в csv и базе
+    DOWNCAST_COLUMNS = ["entrance_number", "floor", "room_count", "flat_number"]
+
+    # Форматы дат, среди которых по выборке определяется преобладающий формат колонки
+    DATE_FORMATS = [
+        "%Y-%m-%d %H:%M:%S.%f%z",
+        "%Y-%m-%d %H:%M:%S%z",
+        "%Y-%m-%dT%H:%M:%S.%f%z",
+        "%Y-%m-%dT%H:%M:%S%z",
+        "%Y-%m-%d %H:%M:%S",
+        "%Y-%m-%d",
+    ]
+    DATE_FORMAT_SAMPLE_SIZE = 1000
     NUMERIC_COLUMNS = [
         "advert_id",
         "entrance_number",
@@ -76,6 +151,10 @@ class Config:
     START_DATE = "2023-07-01"
     END_DATE = "2023-12-31"
 
+    # Режим сводной таблицы: "actualized" - квартиры, актуализированные в дату,
+    # "interval" - квартиры в экспозиции на дату (published_at <= дата <= actualized_at)
+    PIVOT_MODE = "actualized"
+
     AREA_RANGES = [0, 20, 30, 40, 50, 60, 70, 80, 90, 100, float("inf")]
     AREA_LABELS = [
         "<20",
@@ -93,6 +172,9 @@ class Config:
     PRICE_RANGES = [0, 4e6, 5e6, 6e6, 7e6, 8e6, float("inf")]
     PRICE_LABELS = ["<4млн", "4-5млн", "5-6млн", "6-7млн", "7-8млн", ">8млн"]
 
+    # Вид графиков сравнения срезов данных: "bars" - сгруппированные столбцы, "heatmap" - тепловая карта
+    SNAPSHOTS_PLOT_KIND = "bars"
+
     # Директории для вывода
     OUTPUT_TABLES = BASE_DIR / "output" / "tables"
     OUTPUT_PLOTS = BASE_DIR / "output" / "plots"
@@ -103,6 +185,10 @@ class Config:
     os.makedirs(MERGED_DATA_PATH, exist_ok=True)
     os.makedirs(PARSED_DATA_PATH, exist_ok=True)
     os.makedirs(PREPARED_DATA_PATH, exist_ok=True)
+    os.makedirs(PIVOT_STORE_PATH, exist_ok=True)
+    os.makedirs(LISTING_STORE_PATH, exist_ok=True)
+    os.makedirs(PREPARED_CACHE_PATH, exist_ok=True)
+    os.makedirs(CACHE_DIR, exist_ok=True)
 
     os.makedirs(f"{BASE_DIR}/output", exist_ok=True)
     os.makedirs(OUTPUT_TABLES, exist_ok=True)
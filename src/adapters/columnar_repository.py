@@ -0,0 +1,244 @@
+import datetime
+import importlib.util
+import json
+import logging
+import os
+import shutil
+from collections.abc import Iterator
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+class ColumnarRepository:
+    """Хранилище таблиц в бинарном колоночном виде с сохранением типов: Parquet при наличии pyarrow,
+    иначе директория из numpy-файлов колонок, читаемых через отображение в память"""
+
+    PARQUET_SUFFIX = ".parquet"
+    COLUMNS_SUFFIX = ".columns"
+    SCHEMA_FILE = "schema.json"
+
+    @staticmethod
+    def _has_pyarrow() -> bool:
+        """Проверяет, установлен ли pyarrow"""
+
+        return importlib.util.find_spec("pyarrow") is not None
+
+    @staticmethod
+    def _make_file_name(name: str | None, save_date: bool) -> str:
+        """Формирует название файла без расширения"""
+
+        if name and save_date:
+            return f"{name}_{datetime.datetime.now(datetime.UTC).strftime('%Y-%m-%d_%H-%M-%S-%f')}"
+
+        elif name and not save_date:
+            return name
+
+        else:
+            return datetime.datetime.now(datetime.UTC).strftime('%Y-%m-%d_%H-%M-%S-%f')
+
+    @staticmethod
+    def _resolve(file_path: str | Path) -> Path:
+        """Находит сохранённую таблицу по пути без расширения"""
+
+        for suffix in (ColumnarRepository.PARQUET_SUFFIX, ColumnarRepository.COLUMNS_SUFFIX):
+            path = Path(f"{file_path}{suffix}")
+            if path.exists():
+                return path
+
+        raise FileNotFoundError(f"Колоночная таблица {file_path} не найдена")
+
+    @staticmethod
+    def _save_columns(df: pd.DataFrame, path: Path) -> None:
+        """Сохраняет таблицу директорией numpy-файлов колонок и описанием типов"""
+
+        temp_path = path.with_name(f"{path.name}.tmp")
+        shutil.rmtree(temp_path, ignore_errors=True)
+        temp_path.mkdir(parents=True)
+
+        schema = []
+        for position, column in enumerate(df.columns):
+            values = df[column]
+            entry = {"name": column, "file": f"{position}.npy", "dtype": str(values.dtype)}
+
+            if isinstance(values.dtype, pd.DatetimeTZDtype):
+                # Даты с часовым поясом хранятся как datetime64 в UTC, пояс - в описании
+                entry.update(kind="datetimetz", tz=str(values.dt.tz))
+                np.save(temp_path / entry["file"], values.dt.tz_convert("UTC").dt.tz_localize(None).to_numpy())
+
+            elif isinstance(values.dtype, pd.CategoricalDtype):
+                entry.update(kind="category", ordered=bool(values.cat.ordered), uniques=f"{position}.uniques.npy")
+                np.save(temp_path / entry["file"], values.cat.codes.to_numpy())
+                np.save(temp_path / entry["uniques"], values.cat.categories.to_numpy(), allow_pickle=True)
+
+            elif values.dtype == object or isinstance(values.dtype, pd.StringDtype):
+                # Строки хранятся кодами и уникальными значениями, коды читаются через отображение в память
+                codes, uniques = pd.factorize(values)
+                entry.update(kind="object", uniques=f"{position}.uniques.npy")
+                np.save(temp_path / entry["file"], codes.astype(np.int32))
+                np.save(temp_path / entry["uniques"], np.asarray(uniques, dtype=object), allow_pickle=True)
+
+            elif pd.api.types.is_extension_array_dtype(values.dtype) and hasattr(values.dtype, "numpy_dtype"):
+                # Nullable типы (Int64, Float64, boolean) хранятся значениями и маской пропусков
+                entry.update(kind="masked", mask=f"{position}.mask.npy")
+                np.save(temp_path / entry["file"], values.to_numpy(dtype=values.dtype.numpy_dtype, na_value=0))
+                np.save(temp_path / entry["mask"], values.isna().to_numpy())
+
+            else:
+                entry.update(kind="array")
+                np.save(temp_path / entry["file"], values.to_numpy())
+
+            schema.append(entry)
+
+        (temp_path / ColumnarRepository.SCHEMA_FILE).write_text(
+            json.dumps({"rows": len(df), "columns": schema}, ensure_ascii=False), encoding="utf-8"
+        )
+
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(temp_path, path)
+
+    @staticmethod
+    def _read_column(path: Path, entry: dict, rows: slice) -> pd.Series:
+        """Читает колонку из numpy-файла, восстанавливая её тип"""
+
+        values = np.load(path / entry["file"], mmap_mode="r")[rows]
+
+        if entry["kind"] == "datetimetz":
+            return pd.Series(values).dt.tz_localize("UTC").dt.tz_convert(entry["tz"])
+
+        if entry["kind"] == "category":
+            categories = np.load(path / entry["uniques"], allow_pickle=True)
+            return pd.Series(
+                pd.Categorical.from_codes(np.asarray(values), categories=categories, ordered=entry["ordered"])
+            )
+
+        if entry["kind"] == "object":
+            uniques = np.append(np.load(path / entry["uniques"], allow_pickle=True), np.nan)
+            return pd.Series(uniques[values], dtype=entry["dtype"])
+
+        if entry["kind"] == "masked":
+            mask = np.load(path / entry["mask"], mmap_mode="r")[rows]
+            return pd.Series(values).astype(entry["dtype"]).mask(np.asarray(mask))
+
+        return pd.Series(values).astype(entry["dtype"], copy=False)
+
+    @staticmethod
+    def _load_columns(path: Path, columns: list[str] | None, rows: slice = slice(None)) -> pd.DataFrame:
+        """Загружает выбранные колонки и строки из директории numpy-файлов"""
+
+        schema = json.loads((path / ColumnarRepository.SCHEMA_FILE).read_text(encoding="utf-8"))
+        entries = {entry["name"]: entry for entry in schema["columns"]}
+        entries = [entries[column] for column in columns or entries]
+
+        return pd.DataFrame({entry["name"]: ColumnarRepository._read_column(path, entry, rows) for entry in entries})
+
+    @staticmethod
+    def load(
+        file_path: str | Path,
+        separator: str | None = None,
+        schema: dict | None = None,
+        columns: list[str] | None = None,
+    ) -> pd.DataFrame | None:
+        """Загрузка данных, при необходимости - только выбранных колонок"""
+
+        logger.info("Загрузка данных")
+
+        # Параметр separator оставлен для совместимости с CSVRepository, колонки можно передать и через схему
+        columns = columns or (schema or {}).get("usecols")
+
+        try:
+            path = ColumnarRepository._resolve(file_path)
+
+            if path.suffix == ColumnarRepository.PARQUET_SUFFIX:
+                return pd.read_parquet(path, columns=columns)
+
+            return ColumnarRepository._load_columns(path, columns)
+
+        except Exception as e:  # noqa
+            logger.error(f"Ошибка при импорте колоночной таблицы {file_path} : {e}")
+            raise e
+
+    @staticmethod
+    def load_chunks(
+        file_path: str | Path,
+        separator: str | None = None,
+        chunk_size: int = 100_000,
+        schema: dict | None = None,
+        columns: list[str] | None = None,
+    ) -> Iterator[pd.DataFrame]:
+        """Загрузка данных блоками фиксированного размера"""
+
+        logger.info(f"Загрузка данных блоками по {chunk_size} строк")
+
+        columns = columns or (schema or {}).get("usecols")
+
+        try:
+            path = ColumnarRepository._resolve(file_path)
+
+            if path.suffix == ColumnarRepository.PARQUET_SUFFIX:
+                import pyarrow.parquet as pq
+
+                start = 0
+                for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size, columns=columns):
+                    chunk = batch.to_pandas()
+                    chunk.index = pd.RangeIndex(start, start + len(chunk))
+                    start += len(chunk)
+                    yield chunk
+
+                return
+
+            rows = json.loads((path / ColumnarRepository.SCHEMA_FILE).read_text(encoding="utf-8"))["rows"]
+            for start in range(0, rows, chunk_size):
+                chunk = ColumnarRepository._load_columns(path, columns, slice(start, start + chunk_size))
+                chunk.index = pd.RangeIndex(start, start + len(chunk))
+                yield chunk
+
+        except Exception as e:  # noqa
+            logger.error(f"Ошибка при импорте колоночной таблицы {file_path} : {e}")
+            raise e
+
+    @staticmethod
+    def save(
+        df: pd.DataFrame,
+        save_path: str | Path,
+        name: str | None = None,
+        save_date: bool = False,
+        compression: str | None = None,
+    ) -> None:
+        """Сохранение данных"""
+
+        logger.info("Сохранение данных")
+
+        file_name = ColumnarRepository._make_file_name(name=name, save_date=save_date)
+
+        try:
+            # Индекс, как и в CSV, не сохраняется
+            df = df.reset_index(drop=True)
+
+            if ColumnarRepository._has_pyarrow():
+                file_name = f"{file_name}{ColumnarRepository.PARQUET_SUFFIX}"
+                temp_path = Path(save_path) / f"{file_name}.tmp"
+                # Parquet поддерживает сжатие gzip и zstd, для остальных значений используется сжатие по умолчанию
+                if compression in ("gzip", "zstd"):
+                    df.to_parquet(temp_path, index=False, compression=compression)
+
+                else:
+                    df.to_parquet(temp_path, index=False)
+                os.replace(temp_path, Path(save_path) / file_name)
+
+            else:
+                file_name = f"{file_name}{ColumnarRepository.COLUMNS_SUFFIX}"
+                ColumnarRepository._save_columns(df, Path(save_path) / file_name)
+
+            logger.info(
+                f"Файл сохранён в директории: {save_path} с названием {file_name}"
+            )
+
+        except Exception as e:
+            logger.error(
+                f"Ошибка при сохранении файла с название {file_name} в директории: {save_path} : {e}"
+            )
+            raise e
@@ -1,56 +1,256 @@
 import datetime
+import gzip
+import importlib.util
 import logging
+import lzma
+import os
+from collections.abc import Iterable, Iterator
 from pathlib import Path
 
 import pandas as pd
 
+from config import config
+from src.utils.background_writer import background_writer
+
 logger = logging.getLogger(__name__)
 
 
 class CSVRepository:
+    # Расширения сжатых файлов и сигнатуры, по которым сжатие определяется при чтении
+    COMPRESSION_SUFFIXES = {"gzip": ".gz", "zstd": ".zst", "xz": ".xz"}
+    COMPRESSION_SIGNATURES = {b"\x1f\x8b": "gzip", b"\x28\xb5\x2f\xfd": "zstd", b"\xfd7zXZ\x00": "xz"}
+
+    @staticmethod
+    def make_schema(columns: list[str] | None = None) -> dict:
+        """Формирует параметры чтения таблицы квартир: выбранные колонки и типы по колонкам из config"""
+
+        columns = columns or config.BASE_COLUMNS
+
+        # Числа определяет сам парсер, строки и даты читаются как строки без определения типа:
+        # пустая колонка корпуса не превращается во float, а даты разбираются при обработке данных
+        # по уникальным значениям, что быстрее parse_dates в read_csv
+        return {
+            "usecols": columns,
+            "dtype": {column: object for column in columns if column not in config.NUMERIC_COLUMNS},
+        }
+
+    @staticmethod
+    def _resolve_compression(compression: str | None) -> str | None:
+        """Проверяет формат сжатия, при отсутствии zstandard заменяет zstd на gzip"""
+
+        if compression is not None and compression not in CSVRepository.COMPRESSION_SUFFIXES:
+            raise ValueError(f"Неизвестный формат сжатия: {compression}")
+
+        if compression == "zstd" and importlib.util.find_spec("zstandard") is None:
+            logger.warning("Пакет zstandard не установлен, файл будет сжат gzip")
+            return "gzip"
+
+        return compression
+
+    @staticmethod
+    def _find_file(file_path: str | Path) -> tuple[str, str | None]:
+        """Находит CSV файл, сжатый или нет, и определяет сжатие по первым байтам файла"""
+
+        for suffix in ("", *CSVRepository.COMPRESSION_SUFFIXES.values()):
+            path = Path(f"{file_path}.csv{suffix}")
+
+            if path.exists():
+                with open(path, "rb") as file:
+                    head = file.read(6)
+
+                for signature, compression in CSVRepository.COMPRESSION_SIGNATURES.items():
+                    if head.startswith(signature):
+                        return str(path), compression
+
+                return str(path), None
+
+        # Отсутствующий файл передаётся в read_csv, который и сообщит об ошибке
+        return f"{file_path}.csv", None
+
+    @staticmethod
+    def table_name(file_path: Path) -> str | None:
+        """Возвращает название таблицы по имени CSV файла, сжатого или нет, для остальных файлов - None"""
+
+        name = file_path.name
+
+        for suffix in ("", *CSVRepository.COMPRESSION_SUFFIXES.values()):
+            if name.endswith(f".csv{suffix}"):
+                return name[: -len(f".csv{suffix}")]
+
+        return None
+
+    @staticmethod
+    def _read_csv(
+        file_path: str, separator: str | None, schema: dict | None, compression: str | None = None, **kwargs
+    ) -> pd.DataFrame:
+        """Читает CSV самым быстрым доступным движком"""
+
+        options = {"sep": separator, "compression": compression, **(schema or {}), **kwargs}
+
+        # Сжатые файлы читает движок c, распаковывая их потоком
+        if (
+            schema
+            and compression is None
+            and "chunksize" not in kwargs
+            and importlib.util.find_spec("pyarrow") is not None
+        ):
+            try:
+                return pd.read_csv(file_path, engine="pyarrow", **options)
+
+            except ValueError as e:
+                logger.debug(f"Движок pyarrow не поддерживает параметры чтения, используется движок c: {e}")
+
+        return pd.read_csv(file_path, engine="c", **options)
+
+    @staticmethod
+    def _make_file_name(name: str | None, save_date: bool, compression: str | None = None) -> str:
+        """Формирует название файла"""
+
+        suffix = f".csv{CSVRepository.COMPRESSION_SUFFIXES.get(compression, '')}"
+
+        if name and save_date:
+            return f"{name}_{datetime.datetime.now(datetime.UTC).strftime('%Y-%m-%d_%H-%M-%S-%f')}{suffix}"
+
+        elif name and not save_date:
+            return f"{name}{suffix}"
+
+        else:
+            return f"{datetime.datetime.now(datetime.UTC).strftime('%Y-%m-%d_%H-%M-%S-%f')}{suffix}"
+
+    @staticmethod
+    def _open_text(path: Path, compression: str | None):
+        """Открывает файл на запись текста, сжимая его потоком"""
+
+        if compression == "gzip":
+            return gzip.open(path, "wt", encoding="utf-8", newline="")
+
+        if compression == "xz":
+            return lzma.open(path, "wt", encoding="utf-8", newline="")
+
+        if compression == "zstd":
+            import zstandard
+
+            return zstandard.open(path, "wt", encoding="utf-8", newline="")
+
+        return open(path, "w", encoding="utf-8", newline="")
+
     @staticmethod
     def load(
-        file_path: str | Path, separator: str | None
+        file_path: str | Path, separator: str | None, schema: dict | None = None
     ) -> pd.DataFrame | None:
         """Загрузка данных"""
 
         logger.info("Загрузка данных")
 
         try:
-            df = pd.read_csv(f"{file_path}.csv", sep=separator)
+            path, compression = CSVRepository._find_file(file_path)
+            df = CSVRepository._read_csv(path, separator=separator, schema=schema, compression=compression)
             return df
 
         except Exception as e:  # noqa
             logger.error(f"Ошибка при импорте CSV файла {file_path}.csv : {e}")
             raise e
 
+    @staticmethod
+    def load_chunks(
+        file_path: str | Path, separator: str | None, chunk_size: int, schema: dict | None = None
+    ) -> Iterator[pd.DataFrame]:
+        """Загрузка данных блоками фиксированного размера"""
+
+        logger.info(f"Загрузка данных блоками по {chunk_size} строк")
+
+        try:
+            path, compression = CSVRepository._find_file(file_path)
+
+            with CSVRepository._read_csv(
+                path, separator=separator, schema=schema, compression=compression, chunksize=chunk_size
+            ) as reader:
+                yield from reader
+
+        except Exception as e:  # noqa
+            logger.error(f"Ошибка при импорте CSV файла {file_path}.csv : {e}")
+            raise e
+
     @staticmethod
     def save(
         df: pd.DataFrame,
         save_path: str | Path,
         name: str | None = None,
         save_date: bool = False,
+        compression: str | None = None,
     ) -> None:
-        """Сохранение данных"""
+        """Сохранение данных, при необходимости - со сжатием gzip, zstd или xz"""
 
         logger.info("Сохранение данных")
 
-        if name and save_date:
-            file_name = f"{name}_{datetime.datetime.now(datetime.UTC).strftime('%Y-%m-%d_%H-%M-%S-%f')}.csv"
+        compression = CSVRepository._resolve_compression(compression)
+        file_name = CSVRepository._make_file_name(name=name, save_date=save_date, compression=compression)
 
-        elif name and not save_date:
-            file_name = f"{name}.csv"
+        # В фоновом режиме таблица записывается после возврата: до конца записи она не должна изменяться
+        if config.ASYNC_SAVES:
+            background_writer.submit(CSVRepository._write, df, save_path, file_name, compression)
 
         else:
-            file_name = f"{datetime.datetime.now(datetime.UTC).strftime('%Y-%m-%d_%H-%M-%S-%f')}.csv"
+            CSVRepository._write(df, save_path, file_name, compression)
+
+    @staticmethod
+    def _write(df: pd.DataFrame, save_path: str | Path, file_name: str, compression: str | None = None) -> None:
+        """Записывает таблицу во временный файл и переименовывает его: файл не бывает записан частично"""
+
+        path = Path(save_path) / file_name
+        temp_path = path.with_name(f"{path.name}.tmp")
 
         try:
-            df.to_csv(f"{save_path}/{file_name}", index=False)
+            # pandas сжимает таблицу потоком по блокам строк, закодированный файл целиком в памяти не держится
+            df.to_csv(temp_path, index=False, compression=compression)
+            os.replace(temp_path, path)
+            logger.info(
+                f"Файл сохранён в директории: {save_path} с названием {file_name}"
+            )
+
+        except Exception as e:
+            temp_path.unlink(missing_ok=True)
+            logger.error(
+                f"Ошибка при сохранении файла с название {file_name} в директории: {save_path} : {e}"
+            )
+            raise e
+
+    @staticmethod
+    def save_chunks(
+        chunks: Iterable[pd.DataFrame],
+        save_path: str | Path,
+        name: str | None = None,
+        save_date: bool = False,
+        compression: str | None = None,
+    ) -> None:
+        """Сохранение данных, поступающих блоками, с дозаписью каждого блока в файл"""
+
+        logger.info("Сохранение данных блоками")
+
+        compression = CSVRepository._resolve_compression(compression)
+        file_name = CSVRepository._make_file_name(name=name, save_date=save_date, compression=compression)
+        path = Path(save_path) / file_name
+        temp_path = path.with_name(f"{path.name}.tmp")
+
+        try:
+            with CSVRepository._open_text(temp_path, compression) as file:
+                columns = None
+
+                for chunk in chunks:
+                    if columns is None:
+                        columns = chunk.columns
+                        chunk.to_csv(file, index=False)
+
+                    else:
+                        chunk.reindex(columns=columns).to_csv(file, index=False, header=False)
+
+            os.replace(temp_path, path)
             logger.info(
                 f"Файл сохранён в директории: {save_path} с названием {file_name}"
             )
 
         except Exception as e:
+            temp_path.unlink(missing_ok=True)
             logger.error(
                 f"Ошибка при сохранении файла с название {file_name} в директории: {save_path} : {e}"
             )
@@ -0,0 +1,109 @@
+import logging
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+
+import pandas as pd
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+
+class ListingRepository:
+    """Хранилище квартир с обновлением записей по advert_id"""
+
+    TABLE_NAME = "listings"
+    DATE_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+    def __init__(self, db_path: str | Path = config.LISTING_STORE_PATH / "listings.db"):
+        self.db_path = Path(db_path)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Открывает соединение с базой, создавая таблицу при необходимости"""
+
+        columns = []
+        for column in config.BASE_COLUMNS:
+            if column == "advert_id":
+                # Уникальный индекс по advert_id хранится на диске и используется для обновления записей
+                columns.append(f"{column} INTEGER NOT NULL UNIQUE")
+
+            elif column in config.NUMERIC_COLUMNS:
+                columns.append(f"{column} NUMERIC")
+
+            else:
+                columns.append(f"{column} TEXT")
+
+        connection = sqlite3.connect(self.db_path)
+        connection.execute(f"CREATE TABLE IF NOT EXISTS {self.TABLE_NAME} ({', '.join(columns)})")
+
+        return connection
+
+    def _to_records(self, df: pd.DataFrame) -> list[tuple]:
+        """Преобразует таблицу в записи для вставки в базу"""
+
+        table = pd.DataFrame(index=df.index)
+
+        for column in config.BASE_COLUMNS:
+            values = df[column]
+
+            if column in config.DATES_COLUMNS:
+                values = pd.to_datetime(values, utc=True).dt.strftime(self.DATE_FORMAT)
+
+            elif column not in config.NUMERIC_COLUMNS:
+                values = values.astype("string")
+
+            table[column] = values.astype(object).where(values.notna(), None)
+
+        return list(table.itertuples(index=False, name=None))
+
+    def is_empty(self) -> bool:
+        """Проверяет, есть ли квартиры в хранилище"""
+
+        with closing(self._connect()) as connection:
+            return connection.execute(f"SELECT 1 FROM {self.TABLE_NAME} LIMIT 1").fetchone() is None
+
+    def upsert(self, df: pd.DataFrame) -> None:
+        """Обновляет дату актуализации существующих квартир и добавляет новые"""
+
+        logger.info("Обновление хранилища квартир")
+
+        columns = ", ".join(config.BASE_COLUMNS)
+        placeholders = ", ".join("?" * len(config.BASE_COLUMNS))
+        query = (
+            f"INSERT INTO {self.TABLE_NAME} ({columns}) VALUES ({placeholders}) "
+            f"ON CONFLICT(advert_id) DO UPDATE SET actualized_at = excluded.actualized_at"
+        )
+
+        try:
+            with closing(self._connect()) as connection, connection:
+                connection.executemany(query, self._to_records(df))
+
+            logger.info(f"В хранилище квартир {self.db_path} обновлено {len(df)} записей")
+
+        except Exception as e:
+            logger.error(f"Ошибка при обновлении хранилища квартир {self.db_path} : {e}")
+            raise e
+
+    def load(self, columns: list[str] | None = None) -> pd.DataFrame:
+        """Загружает текущее состояние квартир"""
+
+        logger.info("Загрузка данных из хранилища квартир")
+
+        columns = columns or config.BASE_COLUMNS
+
+        try:
+            with closing(self._connect()) as connection:
+                df = pd.read_sql_query(
+                    f"SELECT {', '.join(columns)} FROM {self.TABLE_NAME} ORDER BY rowid", connection
+                )
+
+            for column in config.DATES_COLUMNS:
+                if column in df.columns:
+                    df[column] = pd.to_datetime(df[column], format=self.DATE_FORMAT, utc=True)
+
+            return df
+
+        except Exception as e:
+            logger.error(f"Ошибка при загрузке хранилища квартир {self.db_path} : {e}")
+            raise e
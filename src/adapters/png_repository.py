@@ -1,9 +1,16 @@
 import datetime
+import io
 import logging
+import os
 from pathlib import Path
 
+import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from matplotlib.figure import Figure
 
+from config import config
+from src.utils.background_writer import background_writer
+
 logger = logging.getLogger(__name__)
 
 
@@ -26,19 +33,68 @@ class PNGRepository:
         else:
             file_name = f"{datetime.datetime.now(datetime.UTC).strftime('%Y-%m-%d_%H-%M-%S-%f')}.png"
 
+        # Фигуры pyplot лежат в глобальном реестре pyplot, который не потокобезопасен: они отрисовываются
+        # в вызывающем потоке и закрываются, в фон уходит только запись байтов. Фигуры без pyplot (PlotBuilder)
+        # принадлежат одному потоку и целиком отрисовываются при записи
+        graph: Figure | bytes = fig
+
+        if fig.canvas.manager is not None:
+            try:
+                graph = PNGRepository._render(fig)
+
+            except Exception as e:
+                logger.error(
+                    f"Ошибка при сохранении файла с название {file_name} в директории: {save_path} : {e}"
+                )
+                raise e
+
+            finally:
+                plt.close(fig)
+
+        if config.ASYNC_SAVES:
+            background_writer.submit(PNGRepository._write, graph, save_path, file_name)
+
+        else:
+            PNGRepository._write(graph, save_path, file_name)
+
+    @staticmethod
+    def _render(fig: Figure) -> bytes:
+        """Отрисовывает график в PNG в памяти"""
+
+        if fig.canvas.manager is None:
+            # Фигура без pyplot отрисовывается собственным холстом Agg
+            FigureCanvasAgg(fig)
+
+        buffer = io.BytesIO()
+        fig.savefig(
+            buffer,
+            format="png",
+            dpi=300,
+            bbox_inches="tight",
+            facecolor="white",
+            edgecolor="none",
+        )
+
+        return buffer.getvalue()
+
+    @staticmethod
+    def _write(graph: Figure | bytes, save_path: str | Path, file_name: str) -> None:
+        """Записывает график или уже отрисованный PNG во временный файл и переименовывает его:
+        файл не бывает записан частично"""
+
+        path = Path(save_path) / file_name
+        temp_path = path.with_name(f"{path.name}.tmp")
+
         try:
-            fig.savefig(
-                f"{save_path}/{file_name}",
-                dpi=300,
-                bbox_inches="tight",
-                facecolor="white",
-                edgecolor="none",
-            )
+            content = PNGRepository._render(graph) if isinstance(graph, Figure) else graph
+            temp_path.write_bytes(content)
+            os.replace(temp_path, path)
             logger.info(
                 f"Файл сохранён в директории: {save_path} с названием {file_name}"
             )
 
         except Exception as e:
+            temp_path.unlink(missing_ok=True)
             logger.error(
                 f"Ошибка при сохранении файла с название {file_name} в директории: {save_path} : {e}"
             )
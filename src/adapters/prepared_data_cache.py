@@ -0,0 +1,146 @@
+import hashlib
+import inspect
+import json
+import logging
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from config import config
+from src.adapters import csv_repository
+from src.adapters.columnar_repository import ColumnarRepository
+from src.processing import preprocessor
+
+logger = logging.getLogger(__name__)
+
+
+class PreparedDataCache:
+    """Кэш подготовленных данных по отпечатку сырой выгрузки, настроек и кода обработки"""
+
+    DATA_NAME = "prepared_data"
+    FINGERPRINT_FILE = "fingerprint.json"
+
+    # Настройки, от которых зависит результат загрузки и обработки сырой выгрузки
+    CONFIG_FIELDS = [
+        "SEPARATOR",
+        "BASE_COLUMNS",
+        "NUMERIC_COLUMNS",
+        "DATES_COLUMNS",
+        "DATE_FORMATS",
+        "COMPACT_DTYPES",
+        "CATEGORICAL_COLUMNS",
+        "CATEGORY_MAX_UNIQUE_RATIO",
+        "DOWNCAST_COLUMNS",
+    ]
+
+    # Модули, изменение кода которых меняет подготовленные данные
+    CODE_MODULES = [csv_repository, preprocessor]
+
+    def __init__(self, cache_path: str | Path = config.PREPARED_CACHE_PATH):
+        self.cache_path = Path(cache_path)
+        self.repository = ColumnarRepository()
+
+    @property
+    def data_path(self) -> Path:
+        """Путь к подготовленным данным кэша без расширения"""
+
+        return self.cache_path / self.DATA_NAME
+
+    @staticmethod
+    def _hash_file(file_path: Path) -> str:
+        """Считает хэш содержимого файла, читая его блоками"""
+
+        hasher = hashlib.blake2b(digest_size=20)
+
+        with open(file_path, "rb") as file:
+            for block in iter(lambda: file.read(2**20), b""):
+                hasher.update(block)
+
+        return hasher.hexdigest()
+
+    @staticmethod
+    def _settings_hash() -> str:
+        """Считает хэш настроек и кода обработки"""
+
+        hasher = hashlib.blake2b(digest_size=20)
+
+        for field in PreparedDataCache.CONFIG_FIELDS:
+            hasher.update(repr((field, getattr(config, field))).encode())
+
+        for module in PreparedDataCache.CODE_MODULES:
+            hasher.update(inspect.getsource(module).encode())
+
+        return hasher.hexdigest()
+
+    def _fingerprint(self, raw_file: Path, content_hash: str | None = None) -> dict:
+        """Формирует отпечаток сырой выгрузки"""
+
+        stat = raw_file.stat()
+
+        return {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "content_hash": content_hash or self._hash_file(raw_file),
+            "settings_hash": self._settings_hash(),
+        }
+
+    def _read_fingerprint(self) -> dict | None:
+        """Читает сохранённый отпечаток"""
+
+        try:
+            return json.loads((self.cache_path / self.FINGERPRINT_FILE).read_text(encoding="utf-8"))
+
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def load(self, raw_data_path: str | Path) -> pd.DataFrame | None:
+        """Загружает подготовленные данные, если сырая выгрузка, настройки и код обработки не изменились"""
+
+        raw_file = Path(f"{raw_data_path}.csv")
+        stored = self._read_fingerprint()
+        stat = raw_file.stat()
+
+        if stored is None or stored["size"] != stat.st_size or stored["settings_hash"] != self._settings_hash():
+            logger.info("Кэш подготовленных данных не найден или устарел")
+            return None
+
+        # Файл с прежними размером и временем изменения не перечитывается; при другом времени изменения
+        # сверяется хэш содержимого, так что копирование или touch без изменений кэш не сбрасывают
+        if stored["mtime_ns"] != stat.st_mtime_ns:
+            content_hash = self._hash_file(raw_file)
+
+            if content_hash != stored["content_hash"]:
+                logger.info("Кэш подготовленных данных устарел")
+                return None
+
+            self._write_fingerprint(self._fingerprint(raw_file, content_hash=content_hash))
+
+        try:
+            prepared_data = self.repository.load(file_path=self.data_path)
+
+        except FileNotFoundError:
+            return None
+
+        logger.info(f"Подготовленные данные загружены из кэша {self.cache_path}")
+
+        return prepared_data
+
+    def _write_fingerprint(self, fingerprint: dict) -> None:
+        """Записывает отпечаток"""
+
+        (self.cache_path / self.FINGERPRINT_FILE).write_text(json.dumps(fingerprint), encoding="utf-8")
+
+    def save(self, raw_data_path: str | Path, prepared_data: pd.DataFrame) -> None:
+        """Сохраняет подготовленные данные с отпечатком сырой выгрузки"""
+
+        os.makedirs(self.cache_path, exist_ok=True)
+
+        # Отпечаток удаляется до записи данных: прерванная запись не оставит кэш, принимаемый за актуальный
+        (self.cache_path / self.FINGERPRINT_FILE).unlink(missing_ok=True)
+
+        self.repository.save(df=prepared_data, save_path=self.cache_path, name=self.DATA_NAME, save_date=False)
+
+        self._write_fingerprint(self._fingerprint(Path(f"{raw_data_path}.csv")))
+
+        logger.info(f"Подготовленные данные сохранены в кэш {self.cache_path}")
@@ -1,28 +1,19 @@
 import logging
+from collections.abc import Iterable, Iterator
 
+import numpy as np
 import pandas as pd
 
-from src.utils.decorators import exceptions_handler
+from src.utils.cache import results_cache
+from src.utils.decorators import exceptions_handler, memoize
 
 logger = logging.getLogger(__name__)
 
 
 class DataAggregator:
     @staticmethod
-    @exceptions_handler(logger=logger)
-    def create_active_objects_pivot(df: pd.DataFrame, dates_df: pd.DataFrame) -> pd.DataFrame:
-        """Создаёт сводную таблицу по актуальным квартирам"""
-
-        df = df.assign()
-
-        cross_table = pd.merge(dates_df, df[["gp", "actualized_at"]], how="cross")
-
-        filtered_df = cross_table[
-            (cross_table["actualized_at"].dt.month == cross_table["date"].dt.month)
-            & (cross_table["actualized_at"].dt.day == cross_table["date"].dt.day)
-        ]
-
-        pivot = (filtered_df.groupby(["date", "gp"]).size().reset_index(name="actual_count"))
+    def _format_pivot(pivot: pd.DataFrame) -> pd.DataFrame:
+        """Приводит сводную таблицу к выходному виду"""
 
         pivot["date"] = pivot["date"].dt.strftime("%d.%m.%Y")
         pivot = pivot.rename(
@@ -35,6 +26,118 @@ class DataAggregator:
 
         return pivot
 
+    @staticmethod
+    def _to_calendar_days(dates: pd.Series) -> pd.Series:
+        """Отбрасывает время, оставляя календарный день в часовом поясе исходных дат"""
+
+        if dates.dt.tz is not None:
+            dates = dates.dt.tz_localize(None)
+
+        return dates.dt.normalize()
+
+    @staticmethod
+    def count_actualized_objects(df: pd.DataFrame) -> pd.DataFrame:
+        """Считает количество квартир по дню актуализации и корпусу"""
+
+        # Группировка по календарному дню актуализации вместо перекрёстного соединения с датами:
+        # сложность O(строк), сравнение дат учитывает год
+        return (
+            df[["gp"]]
+            .assign(day=DataAggregator._to_calendar_days(df["actualized_at"]))
+            .groupby(["day", "gp"], observed=True)
+            .size()
+            .reset_index(name="actual_count")
+        )
+
+    @staticmethod
+    def count_interval_objects(df: pd.DataFrame, days: np.ndarray | None = None) -> pd.DataFrame:
+        """Считает количество квартир в экспозиции (published_at <= день <= actualized_at) по дням и корпусам"""
+
+        listings = pd.DataFrame(
+            {
+                "gp": df["gp"],
+                "published": DataAggregator._to_calendar_days(df["published_at"]),
+                "actualized": DataAggregator._to_calendar_days(df["actualized_at"]),
+            }
+        ).dropna()
+
+        if days is None and listings.empty:
+            days = np.array([], dtype="datetime64[ns]")
+
+        elif days is None:
+            days = pd.date_range(listings["published"].min(), listings["actualized"].max()).to_numpy()
+
+        # Индексы первого дня в экспозиции и первого дня после снятия с экспозиции
+        start = np.searchsorted(days, listings["published"].to_numpy(), side="left")
+        end = np.searchsorted(days, listings["actualized"].to_numpy(), side="right")
+        in_range = start < end
+
+        gp_codes, gp_values = pd.factorize(listings["gp"][in_range], sort=True)
+        start, end = start[in_range], end[in_range]
+
+        # События +1 в день публикации и -1 на следующий день после актуализации для каждого корпуса,
+        # накопленная сумма по дням даёт количество квартир в экспозиции
+        width = len(days) + 1
+        size = len(gp_values) * width
+        events = (
+            np.bincount(gp_codes * width + start, minlength=size)
+            - np.bincount(gp_codes * width + end, minlength=size)
+        )
+        counts = events.reshape(len(gp_values), width)[:, :-1].cumsum(axis=1).T
+
+        day_index, gp_index = np.nonzero(counts)
+
+        return pd.DataFrame(
+            {
+                "day": days[day_index],
+                "gp": np.asarray(gp_values)[gp_index],
+                "actual_count": counts[day_index, gp_index],
+            }
+        )
+
+    @staticmethod
+    def create_pivot_from_counts(counts: pd.DataFrame, dates_df: pd.DataFrame) -> pd.DataFrame:
+        """Создаёт сводную таблицу из количества квартир по дням и корпусам для диапазона дат"""
+
+        dates = dates_df[["date"]].drop_duplicates()
+        dates["day"] = DataAggregator._to_calendar_days(dates["date"])
+
+        pivot = dates.merge(counts, on="day", how="inner")
+        pivot = pivot.sort_values(["date", "gp"], ignore_index=True)[["date", "gp", "actual_count"]]
+
+        return DataAggregator._format_pivot(pivot)
+
+    @staticmethod
+    @exceptions_handler(logger=logger)
+    @memoize(results_cache, columns={"df": ["gp", "actualized_at"]})
+    def create_active_objects_pivot(df: pd.DataFrame, dates_df: pd.DataFrame) -> pd.DataFrame:
+        """Создаёт сводную таблицу по актуальным квартирам"""
+
+        counts = DataAggregator.count_actualized_objects(df)
+
+        return DataAggregator.create_pivot_from_counts(counts, dates_df)
+
+    @staticmethod
+    @exceptions_handler(logger=logger)
+    def create_active_objects_pivot_from_cube(cube: pd.Series, dates_df: pd.DataFrame) -> pd.DataFrame:
+        """Создаёт сводную таблицу по актуальным квартирам по кубу"""
+
+        counts = cube.groupby(level=["date", "gp"], observed=True).sum().reset_index(name="actual_count")
+        counts = counts.rename(columns={"date": "day"})
+
+        return DataAggregator.create_pivot_from_counts(counts, dates_df)
+
+    @staticmethod
+    @exceptions_handler(logger=logger)
+    @memoize(results_cache, columns={"df": ["gp", "published_at", "actualized_at"]})
+    def create_interval_objects_pivot(df: pd.DataFrame, dates_df: pd.DataFrame) -> pd.DataFrame:
+        """Создаёт сводную таблицу по квартирам в экспозиции: published_at <= дата <= actualized_at"""
+
+        days = np.sort(DataAggregator._to_calendar_days(dates_df["date"]).unique())
+        counts = DataAggregator.count_interval_objects(df, days=days)
+
+        return DataAggregator.create_pivot_from_counts(counts, dates_df)
+
     @staticmethod
     @exceptions_handler(logger=logger)
     def saturate_old_data(old_data: pd.DataFrame, new_data: pd.DataFrame) -> pd.DataFrame:
@@ -56,3 +159,30 @@ class DataAggregator:
         logger.debug("Таблицы успешно объеденены")
 
         return merged
+
+    @staticmethod
+    def saturate_old_data_chunks(
+        old_chunks: Iterable[pd.DataFrame], new_data: pd.DataFrame
+    ) -> Iterator[pd.DataFrame]:
+        """Объединяет старые данные, поступающие блоками, с новыми, возвращает объединённые блоки"""
+
+        # Индекс нового среза: в памяти держится только он и текущий блок старых данных
+        actualized = new_data.drop_duplicates("advert_id", keep="last").set_index("advert_id")["actualized_at"]
+        matched = np.zeros(len(actualized), dtype=bool)
+
+        for chunk in old_chunks:
+            positions = actualized.index.get_indexer(chunk["advert_id"])
+            found = positions >= 0
+
+            if found.any():
+                chunk.loc[found, "actualized_at"] = actualized.iloc[positions[found]].to_numpy()
+                matched[positions[found]] = True
+
+            yield chunk
+
+        new_records = new_data[~new_data["advert_id"].isin(actualized.index[matched])]
+
+        if not new_records.empty:
+            yield new_records
+
+        logger.debug("Таблицы успешно объеденены")
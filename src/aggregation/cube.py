@@ -0,0 +1,44 @@
+import logging
+
+import pandas as pd
+
+from src.aggregation import aggregator
+from src.aggregation.aggregator import DataAggregator
+from src.processing import histogram
+from src.processing.histogram import Histogram
+from src.utils.cache import results_cache
+from src.utils.decorators import exceptions_handler, memoize
+
+logger = logging.getLogger(__name__)
+
+
+class CubeBuilder:
+    # Измерения куба: день актуализации, корпус, комнатность, номера диапазонов площади и цены
+    DIMENSIONS = ["date", "gp", "room_count", "area_range", "price_range"]
+
+    @staticmethod
+    @exceptions_handler(logger=logger)
+    @memoize(
+        results_cache,
+        ["AREA_RANGES", "PRICE_RANGES"],
+        columns={"df": ["actualized_at", "gp", "room_count", "area", "price"]},
+        depends=[aggregator, histogram],
+    )
+    def build_cube(df: pd.DataFrame) -> pd.Series:
+        """Создаёт куб количества квартир за один проход по таблице"""
+
+        keys = pd.DataFrame(
+            {
+                "date": DataAggregator._to_calendar_days(df["actualized_at"]),
+                "gp": df["gp"],
+                "room_count": df["room_count"],
+                "area_range": Histogram.from_config("area").codes(df["area"]),
+                "price_range": Histogram.from_config("price").codes(df["price"]),
+            }
+        )
+
+        cube = keys.groupby(CubeBuilder.DIMENSIONS, dropna=False, observed=True).size()
+
+        logger.debug(f"Куб из {len(cube)} ячеек построен по {len(df)} строкам")
+
+        return cube
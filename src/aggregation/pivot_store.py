@@ -0,0 +1,175 @@
+import hashlib
+import json
+import logging
+from pathlib import Path
+
+import pandas as pd
+
+from config import config
+from src.adapters.csv_repository import CSVRepository
+from src.aggregation.aggregator import DataAggregator
+from src.utils.background_writer import background_writer
+from src.utils.decorators import exceptions_handler
+
+logger = logging.getLogger(__name__)
+
+
+class PivotStore:
+    """Хранилище количества квартир по дням и корпусам для инкрементального обновления сводной таблицы"""
+
+    LISTINGS_FILE = "listings_state"
+    LISTINGS_COLUMNS = ["advert_id", "gp", "published_at", "actualized_at"]
+    SOURCE_FILE = "source.json"
+
+    def __init__(
+        self,
+        store_path: str | Path = config.PIVOT_STORE_PATH,
+        pivot_mode: str = config.PIVOT_MODE,
+    ):
+        self.store_path = Path(store_path)
+        self.pivot_mode = pivot_mode
+        self.listings: pd.DataFrame | None = None
+        self.counts: pd.DataFrame | None = None
+        self.source_hash: str | None = None
+
+    @property
+    def counts_file(self) -> str:
+        """Название файла с количеством квартир для выбранного режима сводной таблицы"""
+
+        return f"daily_counts_{self.pivot_mode}"
+
+    def exists(self) -> bool:
+        """Проверяет наличие сохранённого хранилища"""
+
+        return (self.store_path / f"{self.LISTINGS_FILE}.csv").exists()
+
+    @staticmethod
+    def _source_hash(df: pd.DataFrame) -> str:
+        """Считает хэш полей старых данных, по которым строится хранилище"""
+
+        hashes = pd.util.hash_pandas_object(df[PivotStore.LISTINGS_COLUMNS], index=False)
+
+        return hashlib.blake2b(hashes.to_numpy().tobytes(), digest_size=20).hexdigest()
+
+    def _read_source_hash(self) -> str | None:
+        """Читает сохранённый хэш старых данных"""
+
+        try:
+            return json.loads((self.store_path / self.SOURCE_FILE).read_text(encoding="utf-8"))["source_hash"]
+
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            return None
+
+    def is_built_from(self, df: pd.DataFrame) -> bool:
+        """Проверяет, что сохранённое хранилище построено по тем же старым данным"""
+
+        return self.exists() and self._read_source_hash() == self._source_hash(df)
+
+    def _count(self, listings: pd.DataFrame) -> pd.DataFrame:
+        """Считает количество квартир по дням и корпусам в выбранном режиме сводной таблицы"""
+
+        if self.pivot_mode == "interval":
+            return DataAggregator.count_interval_objects(listings)
+
+        return DataAggregator.count_actualized_objects(listings)
+
+    def _to_listings(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Оставляет поля, необходимые для подсчёта, усекая даты до дня"""
+
+        listings = (
+            df[self.LISTINGS_COLUMNS]
+            .dropna(subset=["advert_id"])
+            .drop_duplicates("advert_id", keep="last")
+            .set_index("advert_id")
+        )
+
+        for column in config.DATES_COLUMNS:
+            listings[column] = DataAggregator._to_calendar_days(listings[column])
+
+        return listings
+
+    @exceptions_handler(logger=logger)
+    def build(self, df: pd.DataFrame) -> None:
+        """Создаёт хранилище по полной таблице квартир"""
+
+        self.listings = self._to_listings(df)
+        self.counts = self._count(self.listings)
+        self.source_hash = self._source_hash(df)
+
+        logger.debug(f"Хранилище сводной таблицы создано по {len(self.listings)} квартирам")
+
+    @exceptions_handler(logger=logger)
+    def apply_snapshot(self, new_data: pd.DataFrame) -> None:
+        """Применяет новый срез данных: обновляет дату актуализации существующих квартир и добавляет новые"""
+
+        snapshot = self._to_listings(new_data)
+
+        updated_ids = snapshot.index.intersection(self.listings.index)
+        added_ids = snapshot.index.difference(self.listings.index)
+
+        previous = self.listings.loc[updated_ids]
+        changed = pd.concat(
+            [
+                previous.assign(actualized_at=snapshot.loc[updated_ids, "actualized_at"]),
+                snapshot.loc[added_ids],
+            ]
+        )
+
+        # Пересчитываются только изменённые квартиры: их прежний вклад вычитается, новый добавляется
+        removed_counts = self._count(previous)
+        removed_counts["actual_count"] = -removed_counts["actual_count"]
+
+        counts = (
+            pd.concat([self.counts, self._count(changed), removed_counts])
+            .groupby(["day", "gp"], observed=True)["actual_count"]
+            .sum()
+            .reset_index()
+        )
+        self.counts = counts[counts["actual_count"] != 0].reset_index(drop=True)
+
+        self.listings.loc[updated_ids, "actualized_at"] = snapshot.loc[updated_ids, "actualized_at"]
+        self.listings = pd.concat([self.listings, snapshot.loc[added_ids]])
+
+        logger.debug(f"В хранилище сводной таблицы обновлено {len(updated_ids)} и добавлено {len(added_ids)} квартир")
+
+    def to_pivot(self, dates_df: pd.DataFrame) -> pd.DataFrame:
+        """Создаёт сводную таблицу из хранилища для диапазона дат"""
+
+        return DataAggregator.create_pivot_from_counts(self.counts, dates_df)
+
+    @exceptions_handler(logger=logger)
+    def load(self) -> None:
+        """Загружает хранилище с диска"""
+
+        listings = CSVRepository.load(file_path=self.store_path / self.LISTINGS_FILE, separator=",")
+        for column in config.DATES_COLUMNS:
+            listings[column] = pd.to_datetime(listings[column], format="%Y-%m-%d")
+
+        self.listings = listings.set_index("advert_id")
+        self.source_hash = self._read_source_hash()
+
+        if (self.store_path / f"{self.counts_file}.csv").exists():
+            counts = CSVRepository.load(file_path=self.store_path / self.counts_file, separator=",")
+            counts["day"] = pd.to_datetime(counts["day"], format="%Y-%m-%d")
+            self.counts = counts
+
+        else:
+            self.counts = self._count(self.listings)
+
+    @exceptions_handler(logger=logger)
+    def save(self) -> None:
+        """Сохраняет хранилище на диск"""
+
+        # Хэш старых данных удаляется до записи хранилища и записывается после неё:
+        # прерванная запись не оставит хранилище, принимаемое за построенное по текущим данным
+        (self.store_path / self.SOURCE_FILE).unlink(missing_ok=True)
+
+        CSVRepository.save(df=self.listings.reset_index(), save_path=self.store_path, name=self.LISTINGS_FILE)
+        CSVRepository.save(df=self.counts, save_path=self.store_path, name=self.counts_file)
+
+        if config.ASYNC_SAVES:
+            background_writer.flush()
+
+        (self.store_path / self.SOURCE_FILE).write_text(
+            json.dumps({"source_hash": self.source_hash}), encoding="utf-8"
+        )
@@ -1,10 +1,16 @@
+import itertools
 import logging
+import math
+import multiprocessing
 import uuid
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import timezone, datetime as dt
 
 import pandas as pd
 import requests
-from bs4 import BeautifulSoup, ResultSet
+from bs4 import BeautifulSoup, ResultSet, SoupStrainer
 from bs4.element import Tag
 
 from config import config
@@ -12,6 +18,20 @@ from src.utils.decorators import exceptions_handler
 
 logger = logging.getLogger(__name__)
 
+# Классы карточек квартир: на странице сначала берутся акционные, затем обычные
+APARTMENT_CLASSES = [
+    "search-result__list-item search-result__list-item--action list-item",
+    "search-result__list-item list-item",
+]
+
+# Фильтры быстрого разбора: дерево строится только для нужных элементов страницы
+APARTMENTS_STRAINER = SoupStrainer("div", class_=APARTMENT_CLASSES)
+COUNT_STRAINER = SoupStrainer("span", class_="search-result__count-value")
+
+# Процессы разбора не наследуют потоки родителя (загрузка страниц, фоновая запись) и их блокировки:
+# forkserver там, где он есть, иначе spawn
+PARSE_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
 
 class TDSKParser:
     def __init__(self):
@@ -20,11 +40,16 @@ class TDSKParser:
         self.session = requests.Session()
         self.session.headers.update(self.config.PARSER_HEADERS)
 
+        # Пул соединений рассчитан на все одновременно загружаемые страницы
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=max(1, self.config.PARSER_MAX_IN_FLIGHT))
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
     def _get_max_count(self) -> int:
         """Находит количество доступных квартир на сайте"""
 
         response = self.session.get(self.base_url)
-        bs = BeautifulSoup(response.text, "html.parser")
+        bs = BeautifulSoup(response.text, "html.parser", parse_only=COUNT_STRAINER)
         count = bs.find("span", class_="search-result__count-value")
 
         if count:
@@ -33,33 +58,48 @@ class TDSKParser:
         else:
             raise ValueError("Не удалось получить количество доступных квартир")
 
-    def _get_apartments(self, page: int) -> ResultSet:
-        """Парсит квартиры со страницы"""
+    def _get_page(self, page: int) -> str:
+        """Загружает страницу поиска квартир"""
 
         params = {"PAGEN_3": str(page)}
         response = self.session.get(self.base_url, params=params)
-        bs = BeautifulSoup(response.text, "html.parser")
 
-        apartments = bs.find_all("div",class_="search-result__list-item search-result__list-item--action list-item")
+        return response.text
 
-        apartments += bs.find_all("div", class_="search-result__list-item list-item")
+    @staticmethod
+    def _select_apartments(bs: BeautifulSoup) -> ResultSet:
+        """Выбирает карточки квартир: сначала акционные, затем обычные"""
 
-        if apartments:
-            return apartments
+        apartments = bs.find_all("div", class_=APARTMENT_CLASSES[0])
+        apartments += bs.find_all("div", class_=APARTMENT_CLASSES[1])
 
-        else:
-            raise ValueError("Не удалось получить квартиры со страницы сайта")
+        return apartments
+
+    @staticmethod
+    def _find_apartments(html: str) -> ResultSet:
+        """Находит карточки квартир на странице быстрым разбором, при неудаче - по полному дереву страницы"""
+
+        marker = html.find("search-result__list-item")
 
-    def _process_apartments(
-        self, apartments: ResultSet, df: pd.DataFrame
-    ) -> pd.DataFrame:
-        """Обрабатывает список квартир, заполняя таблицу квартир"""
+        if config.PARSER_FAST_HTML and marker != -1:
+            # Страница разбирается с первой карточки, дерево строится только для карточек квартир
+            start = max(html.rfind("<", 0, marker), 0)
+            apartments = TDSKParser._select_apartments(
+                BeautifulSoup(html[start:], "html.parser", parse_only=APARTMENTS_STRAINER)
+            )
 
-        for apartment in apartments:
-            data = self._parse_apartments_element(apartment=apartment)
-            df.loc[len(df)] = data
+            if apartments:
+                return apartments
 
-        return df
+            logger.warning("Быстрый разбор не нашёл квартир на странице, страница разбирается полностью")
+
+        return TDSKParser._select_apartments(BeautifulSoup(html, "html.parser"))
+
+    @staticmethod
+    def _process_apartments(apartments: ResultSet) -> list[dict]:
+        """Обрабатывает список квартир, возвращая записи квартир"""
+
+        return [TDSKParser._parse_apartments_element(apartment=apartment) for apartment in apartments]
 
     @staticmethod
     @exceptions_handler(logger=logger)
@@ -94,27 +134,138 @@ class TDSKParser:
         else:
             raise ValueError("Не удалось заполучить данные квартиры")
 
-    @exceptions_handler(logger=logger)
-    def parse_apartments(self) -> pd.DataFrame | None:
-        """Парсинг сайта застройщика ТДСК"""
+    def _fetch_page(self, page: int, process_pool: ProcessPoolExecutor | None) -> list[dict] | Future:
+        """Загружает страницу и разбирает её в потоке загрузки либо передаёт разбор в пул процессов"""
+
+        html = self._get_page(page=page)
+
+        if process_pool is None:
+            return parse_page(html=html)
+
+        return process_pool.submit(parse_page, html)
+
+    @staticmethod
+    def _parse_context() -> multiprocessing.context.BaseContext:
+        """Контекст процессов разбора страниц"""
+
+        context = multiprocessing.get_context(PARSE_START_METHOD)
+
+        # Сервер forkserver один раз импортирует модуль парсера, процессы разбора создаются из него готовыми
+        if PARSE_START_METHOD == "forkserver":
+            context.set_forkserver_preload([__name__])
+
+        return context
+
+    def _iter_pages(self, max_count: int) -> Iterator[list[dict]]:
+        """Отдаёт записи квартир страниц по порядку, загружая до PARSER_MAX_IN_FLIGHT страниц одновременно
+        и разбирая их на PARSER_PARSE_WORKERS процессах"""
+
+        max_in_flight = max(1, self.config.PARSER_MAX_IN_FLIGHT)
+        parse_workers = self.config.PARSER_PARSE_WORKERS
+
+        if max_in_flight == 1 and parse_workers <= 1:
+            for page in itertools.count(1):
+                yield parse_page(html=self._get_page(page=page))
+
+            return
 
-        columns = self.config.BASE_COLUMNS
-        df = pd.DataFrame(columns=columns)
+        process_pool = (
+            ProcessPoolExecutor(max_workers=parse_workers, mp_context=self._parse_context())
+            if parse_workers > 1
+            else None
+        )
+        executor = None
+
+        try:
+            # Первая страница разбирается до запуска потоков загрузки: по ней известно число страниц
+            first_page = self._fetch_page(page=1, process_pool=process_pool)
+            first_page = first_page.result() if process_pool is not None else first_page
+            yield first_page
+
+            # Число страниц известно по количеству квартир и размеру первой страницы
+            pages = iter(range(2, math.ceil(max_count / len(first_page)) + 1))
+            logger.info(
+                f"Параллельная загрузка страниц: до {max_in_flight} одновременно, процессов разбора: {max(parse_workers, 1)}"
+            )
+
+            executor = ThreadPoolExecutor(max_workers=max_in_flight)
+
+            # Страницы в загрузке, в разборе и ожидающие выдачи ограничены окном: память не растёт,
+            # пока потребитель обрабатывает предыдущие страницы
+            window = max_in_flight + (parse_workers if process_pool is not None else 0)
+            pending = deque(
+                executor.submit(self._fetch_page, page, process_pool) for page in itertools.islice(pages, window)
+            )
+
+            # Следующая страница ставится в загрузку по мере выдачи очередной, порядок страниц сохраняется
+            while pending:
+                records = pending.popleft().result()
+                records = records.result() if process_pool is not None else records
+
+                for page in itertools.islice(pages, 1):
+                    pending.append(executor.submit(self._fetch_page, page, process_pool))
+
+                yield records
+
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True, cancel_futures=True)
+
+            if process_pool is not None:
+                process_pool.shutdown(wait=True, cancel_futures=True)
+
+    def _iter_records(self) -> Iterator[list[dict]]:
+        """Отдаёт записи квартир постранично, пока не собраны все квартиры сайта"""
 
-        page = 1
         current_count = 0
         max_count = self._get_max_count()
 
-        while True:
-            apartments = self._get_apartments(page=page)
-
-            current_count += len(apartments)
+        for records in self._iter_pages(max_count=max_count):
+            current_count += len(records)
 
-            if current_count > max_count or len(apartments) == 0:
+            if current_count > max_count or len(records) == 0:
                 break
 
-            self._process_apartments(apartments=apartments, df=df)
+            yield records
+
+    def _make_frame(self, records: list[dict]) -> pd.DataFrame:
+        """Строит таблицу квартир из записей"""
+
+        return pd.DataFrame.from_records(records, columns=self.config.BASE_COLUMNS)
+
+    def iter_apartments(self, batch_size: int | None = None) -> Iterator[pd.DataFrame]:
+        """Отдаёт квартиры таблицами по мере загрузки страниц: постранично или блоками по batch_size квартир"""
+
+        batch = []
+
+        for records in self._iter_records():
+            batch.extend(records)
+            size = batch_size or len(batch)
+
+            while batch and len(batch) >= size:
+                yield self._make_frame(batch[:size])
+                del batch[:size]
+
+        if batch:
+            yield self._make_frame(batch)
+
+    @exceptions_handler(logger=logger)
+    def parse_apartments(self) -> pd.DataFrame | None:
+        """Парсинг сайта застройщика ТДСК"""
+
+        # Записи копятся списком, таблица строится один раз: построчная вставка в таблицу квадратична
+        records = [record for page_records in self._iter_records() for record in page_records]
+
+        return self._make_frame(records)
+
+
+def parse_page(html: str) -> list[dict]:
+    """Разбирает страницу поиска в записи квартир; функция модуля, чтобы передаваться в пул процессов"""
+
+    apartments = TDSKParser._find_apartments(html=html)
 
-            page += 1
+    if apartments:
+        return TDSKParser._process_apartments(apartments=apartments)
 
-        return df
+    else:
+        raise ValueError("Не удалось получить квартиры со страницы сайта")
@@ -1,10 +1,12 @@
 import logging
-import warnings
 
+import numpy as np
 import pandas as pd
 
-from config import config
-from src.utils.decorators import exceptions_handler
+from src.processing import histogram
+from src.processing.histogram import Histogram
+from src.utils.cache import results_cache
+from src.utils.decorators import exceptions_handler, memoize
 
 logger = logging.getLogger(__name__)
 
@@ -19,33 +21,96 @@ class FeaturesBuilder:
         return dates_df
 
     @staticmethod
-    @exceptions_handler(logger=logger)
-    def create_monthly_activity_features(df: pd.DataFrame) -> pd.DataFrame:
-        """Создаёт таблицу признаков для сравнения месячного количества активных объектов в разрезе комнатности"""
+    def _build_monthly_table(
+        actualized_at: pd.Series, room_count: pd.Series, weights: np.ndarray | None = None
+    ) -> pd.DataFrame:
+        """Считает количество объектов по месяцам и комнатности на целочисленных ключах и разворачивает в таблицу"""
+
+        if actualized_at.dt.tz is not None:
+            actualized_at = actualized_at.dt.tz_localize(None)
+
+        dates = actualized_at.to_numpy()
+        valid = ~np.isnat(dates)
 
-        df_copy = df.assign()
-        features = pd.DataFrame()
+        # Ключ месяца - номер месяца от начала эпохи, совпадающий с порядковым номером периода pd.Period("M")
+        months = dates[valid].astype("datetime64[M]").astype("int64")
 
-        with warnings.catch_warnings():
-            warnings.simplefilter("ignore", UserWarning)
-            features["month"] = df_copy["actualized_at"].dt.to_period("M")
+        # Подписи комнатности строятся только для уникальных значений, одинаковые подписи объединяются
+        room_codes, room_values = pd.factorize(room_count, use_na_sentinel=False)
+        label_codes, labels = pd.factorize(pd.Series(room_values, dtype=room_count.dtype).astype(str) + "-комн.")
+        label_order = np.argsort(labels.to_numpy(), kind="stable")
+        label_codes = np.argsort(label_order)[label_codes]
+        rooms = label_codes[room_codes[valid]]
 
-        features["room_count"] = df_copy["room_count"].astype(str) + "-комн."
+        if weights is not None:
+            weights = weights[valid]
 
-        features = (features.groupby(["month", "room_count"]).size().reset_index(name="count"))
+        first_month = months.min() if len(months) else 0
+        width = max(len(labels), 1)
+        counts = np.bincount((months - first_month) * width + rooms, weights=weights)
+        counts = np.pad(counts, (0, -len(counts) % width)).astype("int64").reshape(-1, width)
 
-        features = features.pivot(index="month", columns="room_count", values="count").fillna(0)
+        # Остаются только встретившиеся месяцы и подписи, как при группировке
+        present_months = counts.any(axis=1)
+        present_labels = counts.any(axis=0)
+        counts = counts[present_months][:, present_labels]
+
+        month_index = pd.PeriodIndex(
+            (np.flatnonzero(present_months) + first_month).astype("datetime64[M]"), freq="M", name="month"
+        )
+
+        features = pd.DataFrame(
+            counts.astype("float64") if (counts == 0).any() else counts,
+            index=month_index,
+            columns=pd.Index(labels.to_numpy()[label_order][present_labels], name="room_count"),
+        )
 
         return features
 
     @staticmethod
     @exceptions_handler(logger=logger)
+    @memoize(results_cache, columns={"df": ["actualized_at", "room_count"]})
+    def create_monthly_activity_features(df: pd.DataFrame) -> pd.DataFrame:
+        """Создаёт таблицу признаков для сравнения месячного количества активных объектов в разрезе комнатности"""
+
+        return FeaturesBuilder._build_monthly_table(df["actualized_at"], df["room_count"])
+
+    @staticmethod
+    @exceptions_handler(logger=logger)
+    def create_monthly_activity_features_from_cube(cube: pd.Series) -> pd.DataFrame:
+        """Создаёт таблицу признаков месячного количества активных объектов в разрезе комнатности по кубу"""
+
+        return FeaturesBuilder._build_monthly_table(
+            pd.Series(cube.index.get_level_values("date")),
+            pd.Series(cube.index.get_level_values("room_count")),
+            weights=cube.to_numpy(),
+        )
+
+    @staticmethod
+    @exceptions_handler(logger=logger)
+    @memoize(results_cache, columns={"old_data": ["room_count"], "new_data": ["room_count"]})
     def create_room_comparison_features(old_data: pd.DataFrame, new_data: pd.DataFrame) -> pd.DataFrame:
         """Создаёт таблицу признаков для сравнения комнатности по количеству квартир"""
 
         old_rooms = old_data["room_count"].value_counts().sort_index()
         new_rooms = new_data["room_count"].value_counts().sort_index()
 
+        return FeaturesBuilder._build_room_table(old_rooms, new_rooms)
+
+    @staticmethod
+    @exceptions_handler(logger=logger)
+    def create_room_comparison_features_from_cubes(old_cube: pd.Series, new_cube: pd.Series) -> pd.DataFrame:
+        """Создаёт таблицу признаков для сравнения комнатности по количеству квартир по кубам"""
+
+        old_rooms = old_cube.groupby(level="room_count").sum().rename("count")
+        new_rooms = new_cube.groupby(level="room_count").sum().rename("count")
+
+        return FeaturesBuilder._build_room_table(old_rooms, new_rooms)
+
+    @staticmethod
+    def _build_room_table(old_rooms: pd.Series, new_rooms: pd.Series) -> pd.DataFrame:
+        """Собирает таблицу сравнения комнатности из количества квартир двух выборок"""
+
         features = pd.DataFrame({"old_count": old_rooms, "new_count": new_rooms}).fillna(0)
 
         features_df = features.reset_index()
@@ -55,36 +120,141 @@ class FeaturesBuilder:
 
     @staticmethod
     @exceptions_handler(logger=logger)
+    @memoize(
+        results_cache,
+        ["AREA_RANGES", "AREA_LABELS"],
+        columns={"old_data": ["area"], "new_data": ["area"]},
+        depends=[histogram],
+    )
     def create_area_comparison_features(old_data: pd.DataFrame, new_data: pd.DataFrame) -> pd.DataFrame:
         """Создает таблицу признаков для сравнения площадей по количеству квартир"""
 
-        bins = config.AREA_RANGES
-        labels = config.AREA_LABELS
+        old_areas, new_areas = Histogram.from_config("area").value_counts(old_data["area"], new_data["area"])
 
-        old_areas = (pd.cut(old_data["area"], bins=bins, labels=labels, right=False).value_counts().sort_index())
-        new_areas = (pd.cut(new_data["area"], bins=bins, labels=labels, right=False).value_counts().sort_index())
+        return FeaturesBuilder._build_range_table(old_areas, new_areas, "area_range")
 
-        features = pd.DataFrame({"old_count": old_areas, "new_count": new_areas}).fillna(0)
+    @staticmethod
+    @exceptions_handler(logger=logger)
+    @memoize(
+        results_cache,
+        ["PRICE_RANGES", "PRICE_LABELS"],
+        columns={"old_data": ["price"], "new_data": ["price"]},
+        depends=[histogram],
+    )
+    def create_price_comparison_features(old_data: pd.DataFrame, new_data: pd.DataFrame) -> pd.DataFrame:
+        """Создает фичи для сравнения цен по количеству квартир"""
 
-        features = features.reset_index()
-        features.rename(columns={"area": "area_range"}, inplace=True)
+        old_prices, new_prices = Histogram.from_config("price").value_counts(old_data["price"], new_data["price"])
 
-        return features
+        return FeaturesBuilder._build_range_table(old_prices, new_prices, "price_range")
 
     @staticmethod
     @exceptions_handler(logger=logger)
-    def create_price_comparison_features(old_data: pd.DataFrame, new_data: pd.DataFrame) -> pd.DataFrame:
-        """Создает фичи для сравнения цен по количеству квартир"""
+    def create_area_comparison_features_from_cubes(old_cube: pd.Series, new_cube: pd.Series) -> pd.DataFrame:
+        """Создает таблицу признаков для сравнения площадей по количеству квартир по кубам"""
 
-        bins = config.PRICE_RANGES
-        labels = config.PRICE_LABELS
+        old_areas, new_areas = FeaturesBuilder._rollup_ranges(
+            old_cube, new_cube, "area_range", Histogram.from_config("area")
+        )
+
+        return FeaturesBuilder._build_range_table(old_areas, new_areas, "area_range")
+
+    @staticmethod
+    @exceptions_handler(logger=logger)
+    def create_price_comparison_features_from_cubes(old_cube: pd.Series, new_cube: pd.Series) -> pd.DataFrame:
+        """Создает фичи для сравнения цен по количеству квартир по кубам"""
 
-        old_prices = (pd.cut(old_data["price"], bins=bins, labels=labels, right=False).value_counts().sort_index())
-        new_prices = (pd.cut(new_data["price"], bins=bins, labels=labels, right=False).value_counts().sort_index())
+        old_prices, new_prices = FeaturesBuilder._rollup_ranges(
+            old_cube, new_cube, "price_range", Histogram.from_config("price")
+        )
 
-        features = pd.DataFrame({"old_count": old_prices, "new_count": new_prices}).fillna(0)
+        return FeaturesBuilder._build_range_table(old_prices, new_prices, "price_range")
+
+    @staticmethod
+    def _rollup_ranges(old_cube: pd.Series, new_cube: pd.Series, level: str, histogram: Histogram) -> list[pd.Series]:
+        """Сворачивает кубы до количества квартир по номерам диапазонов"""
+
+        counts = histogram.count_codes(
+            old_cube.index.get_level_values(level).to_numpy(),
+            new_cube.index.get_level_values(level).to_numpy(),
+            weights=[old_cube.to_numpy(), new_cube.to_numpy()],
+        )
+
+        return [histogram.to_series(sample_counts) for sample_counts in counts]
+
+    @staticmethod
+    def _build_range_table(old_counts: pd.Series, new_counts: pd.Series, range_column: str) -> pd.DataFrame:
+        """Собирает таблицу сравнения диапазонов из количества квартир двух выборок"""
+
+        features = pd.DataFrame({"old_count": old_counts, "new_count": new_counts}).fillna(0)
 
         features = features.reset_index()
-        features.rename(columns={"price": "price_range"}, inplace=True)
+        features.rename(columns={old_counts.index.name: range_column}, inplace=True)
+
+        return features
+
+    @staticmethod
+    def _build_snapshots_table(counts: np.ndarray, labels: list[str], x_col: str, names: list[str]) -> pd.DataFrame:
+        """Собирает таблицу распределений срезов: строка на диапазон, колонка на срез"""
+
+        features = pd.DataFrame({x_col: labels})
+
+        for name, snapshot_counts in zip(names, counts):
+            features[name] = snapshot_counts
 
         return features
+
+    @staticmethod
+    @exceptions_handler(logger=logger)
+    @memoize(results_cache, columns={"snapshots": ["room_count"]})
+    def create_snapshots_room_features(snapshots: dict[str, pd.DataFrame]) -> pd.DataFrame:
+        """Создаёт таблицу признаков комнатности для N срезов данных за один проход"""
+
+        if not snapshots:
+            return FeaturesBuilder._build_snapshots_table(np.empty((0, 0)), [], "room_type", [])
+
+        lengths = [len(df) for df in snapshots.values()]
+        rooms = pd.concat([df["room_count"] for df in snapshots.values()], ignore_index=True)
+
+        codes, room_values = pd.factorize(rooms, sort=True)
+        sample_ids = np.repeat(np.arange(len(lengths)), lengths)
+
+        # Нулевая ячейка каждой строки собирает пропуски комнатности
+        width = len(room_values) + 1
+        counts = np.bincount(sample_ids * width + codes + 1, minlength=len(lengths) * width)
+        counts = counts.reshape(len(lengths), width)[:, 1:]
+
+        # Пропуски комнатности переводят колонку во float, подписи строятся по целым значениям
+        labels = [f"{int(value)}-комн." for value in room_values]
+
+        return FeaturesBuilder._build_snapshots_table(counts, labels, "room_type", list(snapshots))
+
+    @staticmethod
+    @exceptions_handler(logger=logger)
+    @memoize(results_cache, ["AREA_RANGES", "AREA_LABELS"], columns={"snapshots": ["area"]}, depends=[histogram])
+    def create_snapshots_area_features(snapshots: dict[str, pd.DataFrame]) -> pd.DataFrame:
+        """Создаёт таблицу признаков распределения площадей для N срезов данных за один проход"""
+
+        histogram = Histogram.from_config("area")
+
+        if not snapshots:
+            return FeaturesBuilder._build_snapshots_table(np.empty((0, 0)), histogram.labels, "area_range", [])
+
+        counts = histogram.count(*[df["area"] for df in snapshots.values()])
+
+        return FeaturesBuilder._build_snapshots_table(counts, histogram.labels, "area_range", list(snapshots))
+
+    @staticmethod
+    @exceptions_handler(logger=logger)
+    @memoize(results_cache, ["PRICE_RANGES", "PRICE_LABELS"], columns={"snapshots": ["price"]}, depends=[histogram])
+    def create_snapshots_price_features(snapshots: dict[str, pd.DataFrame]) -> pd.DataFrame:
+        """Создаёт таблицу признаков распределения цен для N срезов данных за один проход"""
+
+        histogram = Histogram.from_config("price")
+
+        if not snapshots:
+            return FeaturesBuilder._build_snapshots_table(np.empty((0, 0)), histogram.labels, "price_range", [])
+
+        counts = histogram.count(*[df["price"] for df in snapshots.values()])
+
+        return FeaturesBuilder._build_snapshots_table(counts, histogram.labels, "price_range", list(snapshots))
@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+
+from config import config
+
+
+class Histogram:
+    """Подсчёт количества значений по диапазонам [left, right) с отсортированными границами"""
+
+    def __init__(self, bins: list[float], labels: list[str], name: str | None = None):
+        self.bins = np.asarray(bins, dtype="float64")
+        self.labels = list(labels)
+        self.name = name
+
+        if np.any(np.diff(self.bins) <= 0):
+            raise ValueError("Границы диапазонов должны строго возрастать")
+
+        if len(self.labels) != len(self.bins) - 1:
+            raise ValueError("Количество подписей должно быть на единицу меньше количества границ")
+
+    @classmethod
+    def from_config(cls, column: str) -> "Histogram":
+        """Создаёт гистограмму по диапазонам из конфигурации для колонки area или price"""
+
+        ranges = {
+            "area": (config.AREA_RANGES, config.AREA_LABELS),
+            "price": (config.PRICE_RANGES, config.PRICE_LABELS),
+        }
+        bins, labels = ranges[column]
+
+        return cls(bins=bins, labels=labels, name=column)
+
+    @property
+    def bins_count(self) -> int:
+        """Количество диапазонов"""
+
+        return len(self.labels)
+
+    def codes(self, values: pd.Series | np.ndarray) -> np.ndarray:
+        """Номера диапазонов для значений, -1 для пропусков и значений вне диапазонов"""
+
+        if isinstance(values, pd.Series):
+            values = values.to_numpy(dtype="float64", na_value=np.nan)
+
+        values = np.asarray(values, dtype="float64")
+
+        # Пропуски сортируются в конец, поэтому вместе со значениями правее последней границы получают -1
+        codes = np.searchsorted(self.bins, values, side="right") - 1
+        codes[codes >= self.bins_count] = -1
+
+        return codes
+
+    def count_codes(self, *samples_codes: np.ndarray, weights: list[np.ndarray] | None = None) -> np.ndarray:
+        """Количество значений по номерам диапазонов для каждой выборки, форма (выборки, диапазоны)"""
+
+        # Каждой выборке отводится строка из bins_count + 1 ячеек, нулевая ячейка собирает значения вне диапазонов
+        width = self.bins_count + 1
+        flat_codes = np.concatenate(
+            [codes + (1 + sample_id * width) for sample_id, codes in enumerate(samples_codes)]
+        )
+
+        if weights is not None:
+            weights = np.concatenate(weights)
+
+        counts = np.bincount(flat_codes, weights=weights, minlength=len(samples_codes) * width)
+
+        return counts.astype("int64").reshape(len(samples_codes), width)[:, 1:]
+
+    def count(self, *samples: pd.Series | np.ndarray) -> np.ndarray:
+        """Количество значений по диапазонам для любого числа выборок за один вызов, форма (выборки, диапазоны)"""
+
+        return self.count_codes(*[self.codes(values) for values in samples])
+
+    def to_series(self, counts: np.ndarray) -> pd.Series:
+        """Количество значений по диапазонам с подписями, как у pd.cut(...).value_counts().sort_index()"""
+
+        return pd.Series(
+            counts,
+            index=pd.CategoricalIndex(self.labels, categories=self.labels, ordered=True, name=self.name),
+            name="count",
+        )
+
+    def value_counts(self, *samples: pd.Series | np.ndarray) -> list[pd.Series]:
+        """Количество значений по диапазонам с подписями для каждой выборки"""
+
+        return [self.to_series(counts) for counts in self.count(*samples)]
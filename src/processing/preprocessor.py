@@ -1,6 +1,10 @@
 import logging
 import re
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
 
+import numpy as np
 import pandas as pd
 
 from config import config
@@ -8,28 +12,133 @@ from src.utils.decorators import exceptions_handler
 
 logger = logging.getLogger(__name__)
 
+GP_PATTERN = re.compile(r"(ГП-\d+(?:\.\d+)?)")
+HOUSE_NUMBER_PATTERN = re.compile(r"д\.?\s*(\d+[а-я]?)")
+
+
+def _to_arrays(df: pd.DataFrame) -> tuple[dict[str, np.ndarray], list[str]]:
+    """Разбирает таблицу на numpy-массивы колонок для передачи в процесс, даты с часовым поясом - в UTC без пояса"""
+
+    arrays, utc_columns = {}, []
+
+    for column in df.columns:
+        values = df[column]
+
+        if isinstance(values.dtype, pd.DatetimeTZDtype):
+            values = values.dt.tz_convert("UTC").dt.tz_localize(None)
+            utc_columns.append(column)
+
+        arrays[column] = values.to_numpy()
+
+    return arrays, utc_columns
+
+
+def _from_arrays(arrays: dict[str, np.ndarray], utc_columns: list[str], index: pd.Index) -> pd.DataFrame:
+    """Собирает таблицу из numpy-массивов колонок, возвращая датам часовой пояс UTC"""
+
+    df = pd.DataFrame(arrays, index=index)
+
+    for column in utc_columns:
+        df[column] = df[column].dt.tz_localize("UTC")
+
+    return df
+
+
+def _prepare_partition(arrays: dict[str, np.ndarray], utc_columns: list[str]) -> tuple[dict[str, np.ndarray], list[str]]:
+    """Обрабатывает часть таблицы в процессе пула; типы сжимаются уже в основном процессе по всей таблице"""
+
+    df = _from_arrays(arrays, utc_columns, pd.RangeIndex(len(next(iter(arrays.values()), []))))
+    prepared = DataPreprocessor(compact=False, workers=1)._prepare_frame(df)
+
+    return _to_arrays(prepared)
+
 
 class DataPreprocessor:
+    def __init__(self, compact: bool = config.COMPACT_DTYPES, workers: int = config.PREPROCESSING_WORKERS):
+        self.compact = compact
+        self.workers = workers
+
     @staticmethod
     def _extract_gp_from_address(address: str) -> str | None:
         """Извлекает номер корпуса из адреса, в инома случае - заполлняет номером дома"""
 
-        gp_match = re.search(r"ГП-\d+(?:\.\d+)?", address)
+        gp_match = GP_PATTERN.search(address)
         if gp_match:
             return gp_match.group()
 
-        house_number_match = re.search(r"д\.?\s*(\d+[а-я]?)", address)
+        house_number_match = HOUSE_NUMBER_PATTERN.search(address)
         if house_number_match:
             return f"Дом {house_number_match.group(1)}"
 
         return None
 
+    @staticmethod
+    def _extract_gp_from_addresses(addresses: pd.Series) -> pd.Series:
+        """Извлекает номера корпусов для колонки адресов, разбирая каждый уникальный адрес один раз"""
+
+        codes, unique_addresses = pd.factorize(addresses)
+        unique_addresses = pd.Series(unique_addresses, dtype=object)
+
+        gp = unique_addresses.str.extract(GP_PATTERN, expand=False)
+        house_number = unique_addresses.str.extract(HOUSE_NUMBER_PATTERN, expand=False)
+        extracted = gp.fillna("Дом " + house_number).to_numpy(dtype=object)
+
+        # Пропущенные адреса (код -1) остаются без корпуса
+        result = np.append(extracted, None)[codes]
+
+        return pd.Series(result, index=addresses.index, dtype=object)
+
+    @staticmethod
+    def _detect_date_format(values: pd.Series) -> str | None:
+        """Определяет преобладающий формат дат колонки по выборке значений"""
+
+        step = max(len(values) // config.DATE_FORMAT_SAMPLE_SIZE, 1)
+        sample = values.iloc[::step]
+
+        best_format, best_count = None, 0
+        for date_format in config.DATE_FORMATS:
+            count = pd.to_datetime(sample, format=date_format, utc=True, errors="coerce").notna().sum()
+
+            if count > best_count:
+                best_format, best_count = date_format, count
+
+            # Формат, под который подходит большинство выборки, считается преобладающим
+            if best_count * 2 > len(sample):
+                break
+
+        return best_format
+
+    @staticmethod
+    def _parse_dates(values: pd.Series) -> pd.Series:
+        """Разбирает колонку дат: уникальные строки преобладающего формата векторно, остальные - в режиме mixed"""
+
+        if pd.api.types.is_datetime64_any_dtype(values):
+            return pd.to_datetime(values, utc=True)
+
+        codes, unique_values = pd.factorize(values)
+        unique_values = pd.Series(unique_values, dtype=object)
+
+        date_format = DataPreprocessor._detect_date_format(unique_values)
+        if date_format is None:
+            parsed = pd.Series(pd.NaT, index=unique_values.index, dtype="datetime64[ns, UTC]")
+        else:
+            parsed = pd.to_datetime(unique_values, format=date_format, utc=True, errors="coerce")
+
+        leftovers = parsed.isna()
+        if leftovers.any():
+            parsed[leftovers] = pd.to_datetime(unique_values[leftovers], format="mixed", utc=True)
+
+        # Пропуски (код -1) остаются NaT
+        dates = pd.DatetimeIndex(parsed).take(codes, allow_fill=True, fill_value=pd.NaT)
+
+        return pd.Series(dates, index=values.index, name=values.name)
+
     @staticmethod
     def _cast_dates(df: pd.DataFrame, columns: list[str]) -> pd.DataFrame:
         """Преобразование дат в формат datetime"""
 
         for column in columns:
-            df[column] = pd.to_datetime(df[column], format="mixed", utc=True)
+            df[column] = DataPreprocessor._parse_dates(df[column])
 
         return df
 
@@ -42,6 +151,23 @@ class DataPreprocessor:
 
         return df
 
+    @staticmethod
+    def _compact_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+        """Переводит строки в категории, а целые числа - в минимальные подходящие типы"""
+
+        # Категория хранит каждую строку один раз, в строках таблицы остаются только коды.
+        # Колонки с почти уникальными значениями (адрес с номером квартиры в одной выгрузке) остаются строками
+        for column in config.CATEGORICAL_COLUMNS:
+            if df[column].nunique() <= config.CATEGORY_MAX_UNIQUE_RATIO * len(df):
+                df[column] = df[column].astype("category")
+
+        # Колонки с пропусками остаются float64 и не сужаются
+        for column in config.DOWNCAST_COLUMNS:
+            if pd.api.types.is_integer_dtype(df[column]):
+                df[column] = pd.to_numeric(df[column], downcast="integer")
+
+        return df
+
     def _cast_columns(
         self,
         df: pd.DataFrame,
@@ -53,17 +179,96 @@ class DataPreprocessor:
         df = self._cast_dates(df, dates_columns)
         df = self._cast_to_numeric(df, numeric_columns)
 
+        if self.compact:
+            df = self._compact_dtypes(df)
+
         return df
 
+    def _prepare_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Заполняет пустые корпуса и приводит типы в текущем процессе"""
+
+        mask = df["gp"].isna()
+
+        # В блоке потоковой загрузки колонка корпуса может оказаться полностью пустой и прочитаться как float
+        if mask.any() and df["gp"].dtype != object:
+            df["gp"] = df["gp"].astype(object)
+
+        df.loc[mask, "gp"] = self._extract_gp_from_addresses(df.loc[mask, "address"])
+
+        return self._cast_columns(df=df, numeric_columns=config.NUMERIC_COLUMNS, dates_columns=config.DATES_COLUMNS)
+
+    def _submit(self, executor: ProcessPoolExecutor, df: pd.DataFrame) -> list[tuple[pd.Index, Future]]:
+        """Разбивает таблицу на части по числу процессов и отправляет их в пул"""
+
+        partitions = [df.iloc[positions] for positions in np.array_split(np.arange(len(df)), self.workers)]
+
+        return [
+            (partition.index, executor.submit(_prepare_partition, *_to_arrays(partition)))
+            for partition in partitions
+            if len(partition)
+        ]
+
+    def _collect(self, submitted: list[tuple[pd.Index, Future]]) -> pd.DataFrame:
+        """Собирает обработанные части в исходном порядке строк"""
+
+        prepared = pd.concat([_from_arrays(*future.result(), index=index) for index, future in submitted])
+
+        if self.compact:
+            prepared = self._compact_dtypes(prepared)
+
+        return prepared
+
+    def _use_workers(self, rows: int) -> bool:
+        """Проверяет, окупается ли запуск пула процессов для таблицы"""
+
+        return self.workers > 1 and rows >= self.workers * config.PREPROCESSING_MIN_PARTITION_ROWS
+
     @exceptions_handler(logger=logger)
     def prepare_data(self, df: pd.DataFrame) -> pd.DataFrame | None:
         """Обрабатывает таблицу, заполняя пустые поля и приводит типы"""
 
-        mask = df["gp"].isna()
-        df.loc[mask, "gp"] = df[mask]["address"].map(self._extract_gp_from_address)
+        if self._use_workers(len(df)):
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                df = self._collect(self._submit(executor, df))
 
-        df = self._cast_columns(df=df, numeric_columns=config.NUMERIC_COLUMNS, dates_columns=config.DATES_COLUMNS)
+        else:
+            df = self._prepare_frame(df)
 
         logger.debug("Успешная нормализация таблицы")
 
         return df
+
+    def concat_prepared(self, chunks: list[pd.DataFrame]) -> pd.DataFrame:
+        """Собирает обработанные блоки в таблицу с теми же типами, что и при обработке таблицы целиком"""
+
+        df = pd.concat(chunks, ignore_index=True)
+
+        # Категории и минимальные типы подбирались по каждому блоку: по всей таблице они подбираются заново
+        if self.compact:
+            for column in config.CATEGORICAL_COLUMNS:
+                if isinstance(df[column].dtype, pd.CategoricalDtype):
+                    df[column] = df[column].astype(object)
+
+            df = self._compact_dtypes(df)
+
+        return df
+
+    def iter_prepare_data(self, chunks: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+        """Обрабатывает поток блоков на пуле процессов, возвращая блоки в исходном порядке"""
+
+        if self.workers <= 1:
+            yield from (self.prepare_data(df=chunk) for chunk in chunks)
+            return
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            # В обработке одновременно не больше двух блоков: память ограничена, а пул не простаивает
+            pending = deque()
+
+            for chunk in chunks:
+                pending.append(self._submit(executor, chunk))
+
+                if len(pending) > 1:
+                    yield self._collect(pending.popleft())
+
+            while pending:
+                yield self._collect(pending.popleft())
@@ -1,30 +1,52 @@
+import itertools
 import logging
+from collections.abc import Iterable, Iterator
 from pathlib import Path
 
 import pandas as pd
 
 from config import config
+from src.adapters.columnar_repository import ColumnarRepository
 from src.adapters.csv_repository import CSVRepository
+from src.adapters.listing_repository import ListingRepository
+from src.adapters.prepared_data_cache import PreparedDataCache
 from src.adapters.png_repository import PNGRepository
 from src.aggregation.aggregator import DataAggregator
+from src.aggregation.cube import CubeBuilder
+from src.aggregation.pivot_store import PivotStore
 from src.parsing.parser import TDSKParser
 from src.processing.feature_engineering import FeaturesBuilder
 from src.processing.preprocessor import DataPreprocessor
+from src.utils.background_writer import background_writer
 from src.visualization.plots import PlotBuilder
 
 logger = logging.getLogger(__name__)
 
 
+def select_repository(
+    csv_repository: CSVRepository, columnar_repository: ColumnarRepository, storage: str | None
+) -> CSVRepository | ColumnarRepository:
+    """Выбирает хранилище таблицы по формату хранения места сохранения"""
+
+    if storage == "columnar":
+        return columnar_repository
+
+    return csv_repository
+
+
 def load_old_data(csv_repository: CSVRepository, file_path: str | Path) -> pd.DataFrame:
     """Компонент загрузки старых данных"""
 
-    return csv_repository.load(file_path=file_path, separator=config.SEPARATOR)
+    return csv_repository.load(
+        file_path=file_path, separator=config.SEPARATOR, schema=csv_repository.make_schema()
+    )
 
 
 def prepare_data(
     raw_data: pd.DataFrame,
     preprocessor: DataPreprocessor,
     csv_repository: CSVRepository,
+    columnar_repository: ColumnarRepository,
     save_args: config.SAVE_ARGS,
 ) -> pd.DataFrame:
     """Компонент обработки старых данных"""
@@ -33,16 +55,68 @@ def prepare_data(
 
     prepared_old_data = preprocessor.prepare_data(df=raw_data)
 
-    csv_repository.save(
+    select_repository(csv_repository, columnar_repository, save_args.storage).save(
         df=prepared_old_data,
         save_path=save_args.save_path,
         name=save_args.file_name,
         save_date=save_args.save_date,
+        compression=save_args.compression,
     )
 
     return prepared_old_data
 
 
+def load_prepared_data(
+    raw_data_path: str | Path,
+    preprocessor: DataPreprocessor,
+    csv_repository: CSVRepository,
+    prepared_data_cache: PreparedDataCache,
+) -> pd.DataFrame:
+    """Компонент получения подготовленных старых данных из кэша или загрузкой и обработкой сырой выгрузки"""
+
+    prepared_old_data = prepared_data_cache.load(raw_data_path=raw_data_path)
+
+    if prepared_old_data is not None:
+        return prepared_old_data
+
+    raw = load_old_data(csv_repository=csv_repository, file_path=raw_data_path)
+
+    # Подготовленные данные хранятся одной копией в кэше, потоковая сцепка читает их оттуда же
+    prepared_old_data = prepare_data_without_saving(raw_data=raw, preprocessor=preprocessor)
+
+    prepared_data_cache.save(raw_data_path=raw_data_path, prepared_data=prepared_old_data)
+
+    return prepared_old_data
+
+
+def prepare_data_chunked(
+    raw_data_path: str | Path,
+    preprocessor: DataPreprocessor,
+    csv_repository: CSVRepository,
+    save_args: config.SAVE_ARGS,
+    chunk_size: int,
+) -> None:
+    """Компонент потоковой обработки старых данных блоками с дозаписью результата в файл"""
+
+    logger.info("Потоковая обработка старых данных")
+
+    raw_chunks = csv_repository.load_chunks(
+        file_path=raw_data_path,
+        separator=config.SEPARATOR,
+        chunk_size=chunk_size,
+        schema=csv_repository.make_schema(),
+    )
+    prepared_chunks = preprocessor.iter_prepare_data(chunks=raw_chunks)
+
+    csv_repository.save_chunks(
+        chunks=prepared_chunks,
+        save_path=save_args.save_path,
+        name=save_args.file_name,
+        save_date=save_args.save_date,
+        compression=save_args.compression,
+    )
+
+
 def prepare_data_without_saving(raw_data: pd.DataFrame, preprocessor: DataPreprocessor) -> pd.DataFrame:
     """Компонент обработки старых данных без сохранения в файл"""
 
@@ -53,19 +127,77 @@ def prepare_data_without_saving(raw_data: pd.DataFrame, preprocessor: DataPrepro
     return prepared_old_data
 
 
+def build_cube(prepared_data: pd.DataFrame, cube_builder: CubeBuilder) -> pd.Series:
+    """Компонент построения куба количества квартир для признаков и сводной таблицы"""
+
+    logger.info("Построение куба количества квартир")
+
+    return cube_builder.build_cube(df=prepared_data)
+
+
 def create_pivot_table(
     prepared_old_data: pd.DataFrame,
     aggregator: DataAggregator,
     features_builder: FeaturesBuilder,
     csv_repository: CSVRepository,
     save_args: config.SAVE_ARGS,
+    pivot_mode: str = "actualized",
+    pivot_store: PivotStore | None = None,
+    cube: pd.Series | None = None,
 ) -> None:
     """Компонент создания сводной таблицы"""
 
     logger.info("Создание сводной таблицы")
 
     dates_df = features_builder.create_date_range(start_date=config.START_DATE, end_date=config.END_DATE)
-    pivot = aggregator.create_active_objects_pivot(df=prepared_old_data, dates_df=dates_df)
+
+    if pivot_store is not None:
+        if pivot_store.is_built_from(df=prepared_old_data):
+            logger.info("Загрузка сохранённого хранилища сводной таблицы")
+            pivot_store.load()
+
+        else:
+            if pivot_store.exists():
+                logger.warning("Старые данные изменились: хранилище сводной таблицы создаётся заново")
+
+            pivot_store.build(df=prepared_old_data)
+            pivot_store.save()
+
+        pivot = pivot_store.to_pivot(dates_df=dates_df)
+
+    elif pivot_mode == "interval":
+        pivot = aggregator.create_interval_objects_pivot(df=prepared_old_data, dates_df=dates_df)
+
+    elif cube is not None:
+        pivot = aggregator.create_active_objects_pivot_from_cube(cube=cube, dates_df=dates_df)
+
+    else:
+        pivot = aggregator.create_active_objects_pivot(df=prepared_old_data, dates_df=dates_df)
+
+    csv_repository.save(
+        df=pivot,
+        save_path=save_args.save_path,
+        name=save_args.file_name,
+        save_date=save_args.save_date,
+    )
+
+
+def update_pivot_table(
+    prepared_parsed_data: pd.DataFrame,
+    pivot_store: PivotStore,
+    features_builder: FeaturesBuilder,
+    csv_repository: CSVRepository,
+    save_args: config.SAVE_ARGS,
+) -> None:
+    """Компонент инкрементального обновления сводной таблицы новым срезом данных"""
+
+    logger.info("Обновление сводной таблицы новыми данными")
+
+    pivot_store.apply_snapshot(new_data=prepared_parsed_data)
+    pivot_store.save()
+
+    dates_df = features_builder.create_date_range(start_date=config.START_DATE, end_date=config.END_DATE)
+    pivot = pivot_store.to_pivot(dates_df=dates_df)
 
     csv_repository.save(
         df=pivot,
@@ -81,12 +213,17 @@ def create_monthly_plot(
     plot_builder: PlotBuilder,
     png_repository: PNGRepository,
     save_args: config.SAVE_ARGS,
+    cube: pd.Series | None = None,
 ) -> None:
     """Компонент создания графика активных объектов в разрезе комнатности"""
 
     logger.info("Создание таблицы признаков для построения графика")
 
-    monthly_active_features = features_builder.create_monthly_activity_features(df=prepared_old_data)
+    if cube is not None:
+        monthly_active_features = features_builder.create_monthly_activity_features_from_cube(cube=cube)
+
+    else:
+        monthly_active_features = features_builder.create_monthly_activity_features(df=prepared_old_data)
 
     logger.info("Создание графика месячного количества активных объектов в разрезе комнатности")
 
@@ -100,36 +237,145 @@ def create_monthly_plot(
     )
 
 
+def _collect_chunks(chunks: Iterable[pd.DataFrame], collected: list[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+    """Передаёт блоки дальше, сохраняя их в список"""
+
+    for chunk in chunks:
+        collected.append(chunk)
+        yield chunk
+
+
 def parsing_tdsk(
     parser: TDSKParser,
     preprocessor: DataPreprocessor,
     csv_repository: CSVRepository,
+    columnar_repository: ColumnarRepository,
     save_args: config.SAVE_ARGS,
+    batch_size: int | None = None,
 ) -> pd.DataFrame:
     """Компонент парсинга и обработки данных с сайта ТДСК"""
 
     logger.info("Парсинг сайта застройщика ТДСК")
 
+    if batch_size:
+        return parsing_tdsk_batches(
+            parser=parser,
+            preprocessor=preprocessor,
+            csv_repository=csv_repository,
+            columnar_repository=columnar_repository,
+            save_args=save_args,
+            batch_size=batch_size,
+        )
+
     parsed_data = parser.parse_apartments()
 
+    return _prepare_parsed_data(
+        parsed_data=parsed_data,
+        preprocessor=preprocessor,
+        csv_repository=csv_repository,
+        columnar_repository=columnar_repository,
+        save_args=save_args,
+    )
+
+
+def _prepare_parsed_data(
+    parsed_data: pd.DataFrame,
+    preprocessor: DataPreprocessor,
+    csv_repository: CSVRepository,
+    columnar_repository: ColumnarRepository,
+    save_args: config.SAVE_ARGS,
+) -> pd.DataFrame:
+    """Обрабатывает спарсенную таблицу целиком и сохраняет её"""
+
     logger.info("Обработка данных после парсинга")
 
     prepared_parsed_data = preprocessor.prepare_data(df=parsed_data)
-    csv_repository.save(
+    select_repository(csv_repository, columnar_repository, save_args.storage).save(
         df=prepared_parsed_data,
         save_path=save_args.save_path,
         name=save_args.file_name,
         save_date=save_args.save_date,
+        compression=save_args.compression,
     )
 
     return prepared_parsed_data
 
 
+def parsing_tdsk_batches(
+    parser: TDSKParser,
+    preprocessor: DataPreprocessor,
+    csv_repository: CSVRepository,
+    columnar_repository: ColumnarRepository,
+    save_args: config.SAVE_ARGS,
+    batch_size: int,
+) -> pd.DataFrame:
+    """Компонент потокового парсинга: блоки квартир обрабатываются и дописываются в файл по мере загрузки страниц"""
+
+    logger.info(f"Потоковая обработка данных парсинга блоками по {batch_size} квартир")
+
+    prepared_chunks = preprocessor.iter_prepare_data(chunks=parser.iter_apartments(batch_size=batch_size))
+    first_chunk = next(prepared_chunks, None)
+
+    # Без квартир результат совпадает с обработкой пустой таблицы целиком, как у parse_apartments
+    if first_chunk is None:
+        logger.warning("Парсинг не вернул ни одной квартиры")
+        return _prepare_parsed_data(
+            parsed_data=pd.DataFrame(columns=config.BASE_COLUMNS),
+            preprocessor=preprocessor,
+            csv_repository=csv_repository,
+            columnar_repository=columnar_repository,
+            save_args=save_args,
+        )
+
+    prepared_chunks = itertools.chain([first_chunk], prepared_chunks)
+
+    # Колоночное хранилище не дописывается блоками: таблица сохраняется целиком после обработки
+    if save_args.storage == "columnar":
+        prepared_parsed_data = preprocessor.concat_prepared(chunks=list(prepared_chunks))
+        select_repository(csv_repository, columnar_repository, save_args.storage).save(
+            df=prepared_parsed_data,
+            save_path=save_args.save_path,
+            name=save_args.file_name,
+            save_date=save_args.save_date,
+            compression=save_args.compression,
+        )
+
+        return prepared_parsed_data
+
+    prepared_batches = []
+    csv_repository.save_chunks(
+        chunks=_collect_chunks(prepared_chunks, prepared_batches),
+        save_path=save_args.save_path,
+        name=save_args.file_name,
+        save_date=save_args.save_date,
+        compression=save_args.compression,
+    )
+
+    return preprocessor.concat_prepared(chunks=prepared_batches)
+
+
+def upsert_listings(
+    prepared_old_data: pd.DataFrame,
+    prepared_parsed_data: pd.DataFrame,
+    listing_repository: ListingRepository,
+) -> None:
+    """Компонент обновления хранилища квартир новыми данными"""
+
+    if listing_repository.is_empty():
+        logger.info("Заполнение хранилища квартир старыми данными")
+        listing_repository.upsert(df=prepared_old_data)
+
+    logger.info("Обогащение хранилища квартир новыми данными")
+
+    listing_repository.upsert(df=prepared_parsed_data)
+
+
 def merge_datasets(
     prepared_old_data: pd.DataFrame,
     prepared_parsed_data: pd.DataFrame,
     aggregator: DataAggregator,
     csv_repository: CSVRepository,
+    columnar_repository: ColumnarRepository,
     save_args: config.SAVE_ARGS,
 ) -> None:
     """Компонент сцепки новых и старых таблиц"""
@@ -137,11 +383,45 @@ def merge_datasets(
     logger.info("Обогащение старых данных")
 
     merged_data = aggregator.saturate_old_data(old_data=prepared_old_data, new_data=prepared_parsed_data)
-    csv_repository.save(
+    select_repository(csv_repository, columnar_repository, save_args.storage).save(
         df=merged_data,
         save_path=save_args.save_path,
         name=save_args.file_name,
         save_date=save_args.save_date,
+        compression=save_args.compression,
+    )
+
+
+def merge_datasets_chunked(
+    old_data_path: str | Path,
+    prepared_parsed_data: pd.DataFrame,
+    aggregator: DataAggregator,
+    csv_repository: CSVRepository,
+    columnar_repository: ColumnarRepository,
+    save_args: config.SAVE_ARGS,
+    chunk_size: int,
+    old_data_storage: str = "csv",
+) -> None:
+    """Компонент потоковой сцепки новых и старых таблиц с ограниченным потреблением памяти"""
+
+    logger.info("Потоковое обогащение старых данных")
+
+    # Старые данные могли быть сохранены в этом же запуске: их фоновая запись должна завершиться до чтения
+    if config.ASYNC_SAVES:
+        background_writer.flush()
+
+    # Старые данные читаются из любого формата хранения, результат дописывается блоками в CSV
+    old_chunks = select_repository(csv_repository, columnar_repository, old_data_storage).load_chunks(
+        file_path=old_data_path, separator=",", chunk_size=chunk_size
+    )
+    merged_chunks = aggregator.saturate_old_data_chunks(old_chunks=old_chunks, new_data=prepared_parsed_data)
+
+    csv_repository.save_chunks(
+        chunks=merged_chunks,
+        save_path=save_args.save_path,
+        name=save_args.file_name,
+        save_date=save_args.save_date,
+        compression=save_args.compression,
     )
 
 
@@ -152,14 +432,23 @@ def create_room_comparison_plot(
     plot_builder: PlotBuilder,
     png_repository: PNGRepository,
     save_args: config.SAVE_ARGS,
+    old_cube: pd.Series | None = None,
+    new_cube: pd.Series | None = None,
 ) -> None:
     """Компонент создания графика сравнение количества квартир по комнатности"""
 
     logger.info("Создание графика для сравнение количества квартир по комнатности между старой и новой выборкой")
 
-    room_comparison_features = features_builder.create_room_comparison_features(
-        old_data=prepared_old_data,
-        new_data=prepared_parsed_data,
+    if old_cube is not None and new_cube is not None:
+        room_comparison_features = features_builder.create_room_comparison_features_from_cubes(
+            old_cube=old_cube,
+            new_cube=new_cube,
+        )
+
+    else:
+        room_comparison_features = features_builder.create_room_comparison_features(
+            old_data=prepared_old_data,
+            new_data=prepared_parsed_data,
         )
 
     room_comparison_plot = plot_builder.plot_room_comparison(features_df=room_comparison_features)
@@ -179,14 +468,23 @@ def create_area_comparison_plot(
     plot_builder: PlotBuilder,
     png_repository: PNGRepository,
     save_args: config.SAVE_ARGS,
+    old_cube: pd.Series | None = None,
+    new_cube: pd.Series | None = None,
 ) -> None:
     """Компонент создания графика сравнение количества квартир по площади"""
 
     logger.info("Создание графика для сравнение количества квартир по площади между старой и новой выборкой")
 
-    area_comparison_features = features_builder.create_area_comparison_features(
-        old_data=prepared_old_data,
-        new_data=prepared_parsed_data,
+    if old_cube is not None and new_cube is not None:
+        area_comparison_features = features_builder.create_area_comparison_features_from_cubes(
+            old_cube=old_cube,
+            new_cube=new_cube,
+        )
+
+    else:
+        area_comparison_features = features_builder.create_area_comparison_features(
+            old_data=prepared_old_data,
+            new_data=prepared_parsed_data,
         )
 
     area_comparison_plot = plot_builder.plot_area_comparison(features_df=area_comparison_features)
@@ -205,6 +503,8 @@ def create_price_comparison_plot(
     plot_builder: PlotBuilder,
     png_repository: PNGRepository,
     save_args: config.SAVE_ARGS,
+    old_cube: pd.Series | None = None,
+    new_cube: pd.Series | None = None,
 ) -> None:
     """Компонент создания графика сравнение количества квартир по цене"""
 
@@ -212,12 +512,17 @@ def create_price_comparison_plot(
         "Создание графика для сравнение количества квартир по цене между старой и новой выборкой"
     )
 
-    price_comparison_features = (
-        features_builder.create_price_comparison_features(
+    if old_cube is not None and new_cube is not None:
+        price_comparison_features = features_builder.create_price_comparison_features_from_cubes(
+            old_cube=old_cube,
+            new_cube=new_cube,
+        )
+
+    else:
+        price_comparison_features = features_builder.create_price_comparison_features(
             old_data=prepared_old_data,
             new_data=prepared_parsed_data,
         )
-    )
 
     price_comparison_plot = plot_builder.plot_price_comparison(features_df=price_comparison_features)
     png_repository.save(
@@ -226,3 +531,88 @@ def create_price_comparison_plot(
         name=save_args.file_name,
         save_date=save_args.save_date,
     )
+
+
+def load_snapshots(
+    csv_repository: CSVRepository, columnar_repository: ColumnarRepository, snapshots_path: str | Path
+) -> dict[str, pd.DataFrame]:
+    """Компонент загрузки всех срезов спарсенных данных в хронологическом порядке"""
+
+    logger.info("Загрузка срезов спарсенных данных")
+
+    # Для сравнения срезов нужны только комнатность, площадь и цена
+    schema = csv_repository.make_schema(columns=["room_count", "area", "price"])
+
+    snapshots = {}
+    for file_path in sorted(Path(snapshots_path).iterdir()):
+        # CSV срезы могут быть сжаты: название среза - имя файла без .csv и расширения сжатия
+        name = CSVRepository.table_name(file_path)
+
+        if name is not None:
+            repository = csv_repository
+
+        elif file_path.suffix in (ColumnarRepository.PARQUET_SUFFIX, ColumnarRepository.COLUMNS_SUFFIX):
+            repository = columnar_repository
+            name = file_path.stem
+
+        else:
+            continue
+
+        snapshots[name] = repository.load(file_path=file_path.parent / name, separator=",", schema=schema)
+
+    logger.info(f"Загружено срезов: {len(snapshots)}")
+
+    return snapshots
+
+
+def create_snapshots_comparison_plots(
+    snapshots: dict[str, pd.DataFrame],
+    features_builder: FeaturesBuilder,
+    plot_builder: PlotBuilder,
+    png_repository: PNGRepository,
+    save_args: config.SAVE_ARGS,
+    plot_kind: str = "bars",
+) -> None:
+    """Компонент создания графиков сравнения комнатности, площадей и цен между N срезами данных"""
+
+    if not snapshots:
+        logger.warning("Срезы спарсенных данных не найдены, графики сравнения срезов не создаются")
+        return
+
+    logger.info("Создание графиков сравнения распределений между срезами данных")
+
+    plots = [
+        (
+            "room",
+            features_builder.create_snapshots_room_features(snapshots=snapshots),
+            "room_type",
+            "Сравнение комнатности между срезами",
+            "Количество комнат",
+        ),
+        (
+            "area",
+            features_builder.create_snapshots_area_features(snapshots=snapshots),
+            "area_range",
+            "Сравнение распределения площадей между срезами",
+            "Диапазон площади (м²)",
+        ),
+        (
+            "price",
+            features_builder.create_snapshots_price_features(snapshots=snapshots),
+            "price_range",
+            "Сравнение распределения цен между срезами",
+            "Диапазон цены (млн руб)",
+        ),
+    ]
+
+    for name, features_df, x_col, title, x_label in plots:
+        plot = plot_builder.plot_snapshots_comparison(
+            features_df=features_df, x_col=x_col, title=title, x_label=x_label, kind=plot_kind
+        )
+
+        png_repository.save(
+            fig=plot,
+            save_path=save_args.save_path,
+            name=f"{save_args.file_name}_{name}",
+            save_date=save_args.save_date,
+        )
@@ -3,16 +3,26 @@ import logging
 
 from config import config
 from src.strategies.components import (
+    build_cube,
     load_old_data,
+    load_prepared_data,
     create_price_comparison_plot,
     create_room_comparison_plot,
     create_monthly_plot,
     create_area_comparison_plot,
     create_pivot_table,
+    update_pivot_table,
     prepare_data,
+    prepare_data_chunked,
     parsing_tdsk,
     merge_datasets,
+    merge_datasets_chunked,
+    upsert_listings,
+    load_snapshots,
+    create_snapshots_comparison_plots,
 )
+from src.utils.background_writer import background_writer
+from src.utils.cache import results_cache
 from src.utils.decorators import strategy_timer
 from src.utils.exceptions import StrategyError
 
@@ -39,23 +49,49 @@ class MainStrategy(Strategy):
                 "preprocessor",
                 "plot_builder",
                 "csv_repository",
+                "columnar_repository",
                 "png_repository",
+                "pivot_store",
+                "listing_repository",
+                "cube_builder",
+                "prepared_data_cache",
             ]
         )
 
     @strategy_timer
     def execute(self) -> None:
-        raw = load_old_data(
-            csv_repository=self.dependencies.csv_repository,
-            file_path=config.RAW_DATA_PATH,
-        )
+        if config.PREPARED_CACHE_ENABLED:
+            prepared_old_data = load_prepared_data(
+                raw_data_path=config.RAW_DATA_PATH,
+                preprocessor=self.dependencies.preprocessor,
+                csv_repository=self.dependencies.csv_repository,
+                prepared_data_cache=self.dependencies.prepared_data_cache,
+            )
 
-        prepared_old_data = prepare_data(
-            raw_data=raw,
-            preprocessor=self.dependencies.preprocessor,
-            csv_repository=self.dependencies.csv_repository,
-            save_args=config.SAVE_ARGS(config.PREPARED_DATA_PATH, "prepared_data", False),
-        )
+            # Потоковая сцепка читает подготовленные данные из кэша: на попадании в кэш они не пересохраняются
+            old_data_path = self.dependencies.prepared_data_cache.data_path
+            old_data_storage = "columnar"
+
+        else:
+            raw = load_old_data(
+                csv_repository=self.dependencies.csv_repository,
+                file_path=config.RAW_DATA_PATH,
+            )
+
+            prepared_old_data = prepare_data(
+                raw_data=raw,
+                preprocessor=self.dependencies.preprocessor,
+                csv_repository=self.dependencies.csv_repository,
+                columnar_repository=self.dependencies.columnar_repository,
+                save_args=config.SAVE_ARGS(
+                    config.PREPARED_DATA_PATH, "prepared_data", False, config.PREPARED_DATA_STORAGE
+                ),
+            )
+
+            old_data_path = f"{config.PREPARED_DATA_PATH}/prepared_data"
+            old_data_storage = config.PREPARED_DATA_STORAGE
+
+        old_cube = build_cube(prepared_data=prepared_old_data, cube_builder=self.dependencies.cube_builder)
 
         create_pivot_table(
             prepared_old_data=prepared_old_data,
@@ -63,6 +99,9 @@ class MainStrategy(Strategy):
             features_builder=self.dependencies.features_builder,
             csv_repository=self.dependencies.csv_repository,
             save_args=config.SAVE_ARGS(config.OUTPUT_TABLES, "pivot_table", False),
+            pivot_mode=config.PIVOT_MODE,
+            pivot_store=self.dependencies.pivot_store,
+            cube=old_cube,
         )
 
         create_monthly_plot(
@@ -71,23 +110,71 @@ class MainStrategy(Strategy):
             plot_builder=self.dependencies.plot_builder,
             png_repository=self.dependencies.png_repository,
             save_args=config.SAVE_ARGS(config.OUTPUT_PLOTS, "plot_monthly_activity", False),
+            cube=old_cube,
         )
 
         prepared_parsed_data = parsing_tdsk(
             parser=self.dependencies.tdsk_parser,
             preprocessor=self.dependencies.preprocessor,
             csv_repository=self.dependencies.csv_repository,
-            save_args=config.SAVE_ARGS(config.PARSED_DATA_PATH, "parsed_data", True),
+            columnar_repository=self.dependencies.columnar_repository,
+            save_args=config.SAVE_ARGS(
+                config.PARSED_DATA_PATH,
+                "parsed_data",
+                True,
+                config.PARSED_DATA_STORAGE,
+                config.PARSED_DATA_COMPRESSION,
+            ),
+            batch_size=config.PARSER_BATCH_SIZE,
         )
 
-        merge_datasets(
-            prepared_old_data=prepared_old_data,
+        new_cube = build_cube(prepared_data=prepared_parsed_data, cube_builder=self.dependencies.cube_builder)
+
+        update_pivot_table(
             prepared_parsed_data=prepared_parsed_data,
-            aggregator=self.dependencies.aggregator,
+            pivot_store=self.dependencies.pivot_store,
+            features_builder=self.dependencies.features_builder,
             csv_repository=self.dependencies.csv_repository,
-            save_args=config.SAVE_ARGS(config.MERGED_DATA_PATH, "merged_data", True),
+            save_args=config.SAVE_ARGS(config.OUTPUT_TABLES, "pivot_table", False),
         )
 
+        upsert_listings(
+            prepared_old_data=prepared_old_data,
+            prepared_parsed_data=prepared_parsed_data,
+            listing_repository=self.dependencies.listing_repository,
+        )
+
+        if config.SAVE_MERGED_DUMPS:
+            if config.MERGE_CHUNK_SIZE:
+                merge_datasets_chunked(
+                    old_data_path=old_data_path,
+                    prepared_parsed_data=prepared_parsed_data,
+                    aggregator=self.dependencies.aggregator,
+                    csv_repository=self.dependencies.csv_repository,
+                    columnar_repository=self.dependencies.columnar_repository,
+                    save_args=config.SAVE_ARGS(
+                        config.MERGED_DATA_PATH, "merged_data", True, compression=config.MERGED_DATA_COMPRESSION
+                    ),
+                    chunk_size=config.MERGE_CHUNK_SIZE,
+                    old_data_storage=old_data_storage,
+                )
+
+            else:
+                merge_datasets(
+                    prepared_old_data=prepared_old_data,
+                    prepared_parsed_data=prepared_parsed_data,
+                    aggregator=self.dependencies.aggregator,
+                    csv_repository=self.dependencies.csv_repository,
+                    columnar_repository=self.dependencies.columnar_repository,
+                    save_args=config.SAVE_ARGS(
+                        config.MERGED_DATA_PATH,
+                        "merged_data",
+                        True,
+                        config.MERGED_DATA_STORAGE,
+                        config.MERGED_DATA_COMPRESSION,
+                    ),
+                )
+
         create_room_comparison_plot(
             prepared_old_data=prepared_old_data,
             prepared_parsed_data=prepared_parsed_data,
@@ -95,6 +182,8 @@ class MainStrategy(Strategy):
             plot_builder=self.dependencies.plot_builder,
             png_repository=self.dependencies.png_repository,
             save_args=config.SAVE_ARGS(config.OUTPUT_PLOTS, "room_comparison_plot", True),
+            old_cube=old_cube,
+            new_cube=new_cube,
         )
 
         create_area_comparison_plot(
@@ -104,6 +193,8 @@ class MainStrategy(Strategy):
             plot_builder=self.dependencies.plot_builder,
             png_repository=self.dependencies.png_repository,
             save_args=config.SAVE_ARGS(config.OUTPUT_PLOTS, "area_comparison_plot", True),
+            old_cube=old_cube,
+            new_cube=new_cube,
         )
 
         create_price_comparison_plot(
@@ -113,8 +204,13 @@ class MainStrategy(Strategy):
             plot_builder=self.dependencies.plot_builder,
             png_repository=self.dependencies.png_repository,
             save_args=config.SAVE_ARGS(config.OUTPUT_PLOTS, "price_comparison_plot", True),
+            old_cube=old_cube,
+            new_cube=new_cube,
         )
 
+        results_cache.log_stats()
+        background_writer.flush()
+
 
 class ParseStrategy(Strategy):
     """Стратегия парсинга"""
@@ -122,7 +218,9 @@ class ParseStrategy(Strategy):
     def __init__(self):
         from src.utils.dependency import setup_dependencies
 
-        self.dependencies = setup_dependencies(["tdsk_parser", "preprocessor", "csv_repository"])
+        self.dependencies = setup_dependencies(
+            ["tdsk_parser", "preprocessor", "csv_repository", "columnar_repository"]
+        )
 
     @strategy_timer
     def execute(self) -> None:
@@ -130,7 +228,63 @@ class ParseStrategy(Strategy):
             parser=self.dependencies.tdsk_parser,
             preprocessor=self.dependencies.preprocessor,
             csv_repository=self.dependencies.csv_repository,
-            save_args=config.SAVE_ARGS(config.PARSED_DATA_PATH, "tdsk", True),
+            columnar_repository=self.dependencies.columnar_repository,
+            save_args=config.SAVE_ARGS(
+                config.PARSED_DATA_PATH, "tdsk", True, config.PARSED_DATA_STORAGE, config.PARSED_DATA_COMPRESSION
+            ),
+            batch_size=config.PARSER_BATCH_SIZE,
+        )
+
+        background_writer.flush()
+
+
+class SnapshotsStrategy(Strategy):
+    """Стратегия сравнения всех срезов спарсенных данных"""
+
+    def __init__(self):
+        from src.utils.dependency import setup_dependencies
+
+        self.dependencies = setup_dependencies(
+            ["features_builder", "plot_builder", "csv_repository", "columnar_repository", "png_repository"]
+        )
+
+    @strategy_timer
+    def execute(self) -> None:
+        snapshots = load_snapshots(
+            csv_repository=self.dependencies.csv_repository,
+            columnar_repository=self.dependencies.columnar_repository,
+            snapshots_path=config.PARSED_DATA_PATH,
+        )
+
+        create_snapshots_comparison_plots(
+            snapshots=snapshots,
+            features_builder=self.dependencies.features_builder,
+            plot_builder=self.dependencies.plot_builder,
+            png_repository=self.dependencies.png_repository,
+            save_args=config.SAVE_ARGS(config.OUTPUT_PLOTS, "snapshots_comparison_plot", True),
+            plot_kind=config.SNAPSHOTS_PLOT_KIND,
+        )
+
+        results_cache.log_stats()
+        background_writer.flush()
+
+
+class PrepareStrategy(Strategy):
+    """Стратегия потоковой обработки сырой выгрузки блоками"""
+
+    def __init__(self):
+        from src.utils.dependency import setup_dependencies
+
+        self.dependencies = setup_dependencies(["preprocessor", "csv_repository"])
+
+    @strategy_timer
+    def execute(self) -> None:
+        prepare_data_chunked(
+            raw_data_path=config.RAW_DATA_PATH,
+            preprocessor=self.dependencies.preprocessor,
+            csv_repository=self.dependencies.csv_repository,
+            save_args=config.SAVE_ARGS(config.PREPARED_DATA_PATH, "prepared_data", False),
+            chunk_size=config.PREPROCESSING_CHUNK_SIZE,
         )
 
 
@@ -0,0 +1,70 @@
+import logging
+import queue
+import threading
+from collections.abc import Callable
+
+from config import config
+from src.utils.exceptions import WriterError
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundWriter:
+    """Фоновая запись файлов: ограниченная очередь задач и потоки записи"""
+
+    def __init__(self, workers: int = config.WRITER_WORKERS, queue_size: int = config.WRITER_QUEUE_SIZE):
+        self.workers = workers
+
+        # При заполненной очереди добавление задачи ждёт: в памяти не копятся несохранённые результаты
+        self._tasks: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._errors: list[Exception] = []
+        self._threads: list[threading.Thread] = []
+        self._lock = threading.Lock()
+
+    def _start(self) -> None:
+        """Запускает потоки записи при первой задаче"""
+
+        with self._lock:
+            if self._threads:
+                return
+
+            for number in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"background-writer-{number}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _work(self) -> None:
+        """Выполняет задачи записи из очереди"""
+
+        while True:
+            func, args, kwargs = self._tasks.get()
+
+            try:
+                func(*args, **kwargs)
+
+            except Exception as e:  # noqa
+                with self._lock:
+                    self._errors.append(e)
+
+            finally:
+                self._tasks.task_done()
+
+    def submit(self, func: Callable, *args, **kwargs) -> None:
+        """Ставит запись в очередь"""
+
+        self._start()
+        self._tasks.put((func, args, kwargs))
+
+    def flush(self) -> None:
+        """Ожидает завершения всех записей и сообщает об ошибках"""
+
+        self._tasks.join()
+
+        with self._lock:
+            errors, self._errors = self._errors, []
+
+        if errors:
+            raise WriterError(f"Не удалось записать файлов в фоновом режиме: {len(errors)}") from errors[0]
+
+
+background_writer = BackgroundWriter()
@@ -0,0 +1,173 @@
+import hashlib
+import logging
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import pandas as pd
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+
+class ResultCache:
+    """Кэш результатов с ключом по содержимому входных данных: уровни в памяти и на диске с вытеснением LRU"""
+
+    def __init__(
+        self,
+        cache_dir: str | Path = config.CACHE_DIR,
+        memory_limit: int = config.CACHE_MEMORY_LIMIT,
+        disk_limit: int = config.CACHE_DISK_LIMIT,
+        enabled: bool = config.CACHE_ENABLED,
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.memory_limit = memory_limit
+        self.disk_limit = disk_limit
+        self.enabled = enabled
+
+        self.hits = 0
+        self.misses = 0
+
+        # В памяти хранятся сериализованные результаты: размер известен точно, а вызывающий код получает копию
+        self._memory: OrderedDict[str, bytes] = OrderedDict()
+        self._memory_size = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _update_hash(hasher: "hashlib._Hash", value: object) -> None:
+        """Добавляет значение в хэш, для таблиц - по содержимому"""
+
+        if isinstance(value, pd.DataFrame):
+            hasher.update(repr((list(value.columns), [str(dtype) for dtype in value.dtypes])).encode())
+            hasher.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+
+        elif isinstance(value, pd.Series):
+            hasher.update(repr((value.name, str(value.dtype), value.index.names)).encode())
+            hasher.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+
+        elif isinstance(value, dict):
+            for key in sorted(value, key=repr):
+                hasher.update(repr(key).encode())
+                ResultCache._update_hash(hasher, value[key])
+
+        elif isinstance(value, (list, tuple)):
+            hasher.update(f"{type(value).__name__}{len(value)}".encode())
+            for item in value:
+                ResultCache._update_hash(hasher, item)
+
+        else:
+            hasher.update(repr(value).encode())
+
+    def make_key(self, *parts: object) -> str:
+        """Вычисляет ключ кэша по содержимому переданных значений"""
+
+        hasher = hashlib.blake2b(digest_size=20)
+        for part in parts:
+            self._update_hash(hasher, part)
+
+        return hasher.hexdigest()
+
+    def get(self, key: str) -> tuple[bool, object]:
+        """Возвращает признак попадания и сохранённый результат"""
+
+        with self._lock:
+            payload = self._memory.get(key)
+
+            if payload is not None:
+                self._memory.move_to_end(key)
+
+            else:
+                payload = self._read_disk(key)
+
+                if payload is not None:
+                    self._put_memory(key, payload)
+
+            if payload is None:
+                self.misses += 1
+                return False, None
+
+            self.hits += 1
+
+        return True, pickle.loads(payload)
+
+    def put(self, key: str, value: object) -> None:
+        """Сохраняет результат в памяти и на диске"""
+
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+        with self._lock:
+            self._put_memory(key, payload)
+            self._write_disk(key, payload)
+
+    def _put_memory(self, key: str, payload: bytes) -> None:
+        """Сохраняет результат в памяти, вытесняя давно не использованные"""
+
+        if len(payload) > self.memory_limit:
+            return
+
+        if key in self._memory:
+            self._memory_size -= len(self._memory.pop(key))
+
+        self._memory[key] = payload
+        self._memory_size += len(payload)
+
+        while self._memory_size > self.memory_limit:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_size -= len(evicted)
+
+    def _read_disk(self, key: str) -> bytes | None:
+        """Читает результат с диска, отмечая время использования"""
+
+        path = self.cache_dir / f"{key}.pkl"
+
+        try:
+            payload = path.read_bytes()
+            os.utime(path)
+            return payload
+
+        except FileNotFoundError:
+            return None
+
+    def _write_disk(self, key: str, payload: bytes) -> None:
+        """Записывает результат на диск, вытесняя давно не использованные файлы"""
+
+        if len(payload) > self.disk_limit:
+            return
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        path = self.cache_dir / f"{key}.pkl"
+        temp_path = path.with_suffix(".tmp")
+        temp_path.write_bytes(payload)
+        os.replace(temp_path, path)
+
+        files = sorted(self.cache_dir.glob("*.pkl"), key=lambda file: file.stat().st_mtime_ns)
+        total_size = sum(file.stat().st_size for file in files)
+
+        for file in files:
+            if total_size <= self.disk_limit:
+                break
+
+            total_size -= file.stat().st_size
+            file.unlink(missing_ok=True)
+
+    def clear(self) -> None:
+        """Очищает оба уровня кэша"""
+
+        with self._lock:
+            self._memory.clear()
+            self._memory_size = 0
+
+            for file in self.cache_dir.glob("*.pkl"):
+                file.unlink(missing_ok=True)
+
+    def log_stats(self) -> None:
+        """Выводит в лог количество попаданий и промахов"""
+
+        logger.info(f"Кэш результатов: попаданий {self.hits}, промахов {self.misses}")
+
+
+results_cache = ResultCache()
@@ -1,11 +1,16 @@
+from src.adapters.columnar_repository import ColumnarRepository
 from src.adapters.csv_repository import CSVRepository
+from src.adapters.listing_repository import ListingRepository
+from src.adapters.prepared_data_cache import PreparedDataCache
 from src.adapters.png_repository import PNGRepository
 from src.aggregation.aggregator import DataAggregator
+from src.aggregation.cube import CubeBuilder
+from src.aggregation.pivot_store import PivotStore
 from src.parsing.parser import TDSKParser
 from src.processing.feature_engineering import FeaturesBuilder
 from src.processing.preprocessor import DataPreprocessor
 from src.visualization.plots import PlotBuilder
-from src.strategies.strategies import MainStrategy, ParseStrategy
+from src.strategies.strategies import MainStrategy, ParseStrategy, PrepareStrategy, SnapshotsStrategy
 
 DEPENDENCY_MAP = {
     "aggregator": DataAggregator,
@@ -14,10 +19,17 @@ DEPENDENCY_MAP = {
     "preprocessor": DataPreprocessor,
     "plot_builder": PlotBuilder,
     "csv_repository": CSVRepository,
+    "columnar_repository": ColumnarRepository,
     "png_repository": PNGRepository,
+    "pivot_store": PivotStore,
+    "listing_repository": ListingRepository,
+    "cube_builder": CubeBuilder,
+    "prepared_data_cache": PreparedDataCache,
 }
 
 STRATEGY_MAP = {
     "main": MainStrategy,
     "parse": ParseStrategy,
+    "snapshots": SnapshotsStrategy,
+    "prepare": PrepareStrategy,
 }
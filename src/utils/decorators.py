@@ -1,6 +1,11 @@
 import datetime
+import hashlib
+import inspect
 import logging
 from functools import wraps
+from types import ModuleType
+
+from config import config
 
 
 def strategy_timer(func):
@@ -37,3 +42,63 @@ def exceptions_handler(logger: logging.Logger):
         return wrapper
 
     return decorator
+
+
+def memoize(
+    cache,
+    config_fields: list[str] | None = None,
+    columns: dict[str, list[str]] | None = None,
+    depends: list[ModuleType] | None = None,
+):
+    """Кэширует результат функции по содержимому аргументов, значениям конфигурации и версии кода модуля
+    и модулей depends, код которых функция вызывает"""
+
+    def select_columns(value, used_columns: list[str]):
+        """Оставляет в таблице (или словаре таблиц) только читаемые функцией колонки"""
+
+        if isinstance(value, dict):
+            return {name: select_columns(item, used_columns) for name, item in value.items()}
+
+        return value[used_columns]
+
+    def decorator(func):
+        signature = inspect.signature(func)
+        code_version = hashlib.blake2b(digest_size=16)
+        for module in [inspect.getmodule(func), *(depends or [])]:
+            code_version.update(inspect.getsource(module).encode())
+        code_version = code_version.hexdigest()
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not cache.enabled:
+                return func(*args, **kwargs)
+
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+
+            # Хэшируются только колонки, которые читает функция: хэш широкой таблицы дороже самого расчёта
+            arguments = dict(bound.arguments)
+            for name, used_columns in (columns or {}).items():
+                arguments[name] = select_columns(arguments[name], used_columns)
+
+            key = cache.make_key(
+                func.__module__,
+                func.__qualname__,
+                code_version,
+                {field: getattr(config, field) for field in config_fields or []},
+                arguments,
+            )
+
+            found, result = cache.get(key)
+            if found:
+                logging.getLogger(func.__module__).debug(f"Результат функции {func.__name__} получен из кэша")
+                return result
+
+            result = func(*args, **kwargs)
+            cache.put(key, result)
+
+            return result
+
+        return wrapper
+
+    return decorator
@@ -12,3 +12,11 @@ class StrategyError(Exception):
     def __init__(self, message: str = "Отсутствует необходимая стратегия в словаре стратегий"):
         self.message = message
         super().__init__(self.message)
+
+
+class WriterError(Exception):
+    """Исключение, вызыванное ошибками фоновой записи файлов"""
+
+    def __init__(self, message: str = "Не удалось записать файлы в фоновом режиме"):
+        self.message = message
+        super().__init__(self.message)
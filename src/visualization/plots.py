@@ -1,7 +1,7 @@
 import logging
 
-import matplotlib.pyplot as plt
 import pandas as pd
+from matplotlib.axes import Axes
 from matplotlib.figure import Figure
 
 from src.utils.decorators import exceptions_handler
@@ -11,24 +11,33 @@ logger = logging.getLogger(__name__)
 
 class PlotBuilder:
     @staticmethod
-    def _plot_comparison_bars(
+    def _create_figure(figsize: tuple[float, float]) -> tuple[Figure, Axes]:
+        """Создаёт график без pyplot: фигура не попадает в глобальный реестр и может отрисовываться в другом потоке"""
+
+        fig = Figure(figsize=figsize)
+
+        return fig, fig.subplots()
+
+    @staticmethod
+    def _plot_grouped_bars(
         features_df: pd.DataFrame,
         x_col: str,
-        old_col: str,
-        new_col: str,
+        value_cols: list[str],
+        value_labels: list[str],
         title: str,
         x_label: str,
         y_label: str,
     ) -> Figure:
-        """Вспомогательный метод для построения сравнительных графиков"""
+        """Вспомогательный метод для построения сгруппированных столбцов по нескольким выборкам"""
 
-        fig, ax = plt.subplots(figsize=(12, 6))
+        fig, ax = PlotBuilder._create_figure(figsize=(12, 6))
 
         points = range(len(features_df))
-        width = 0.35
+        width = 0.7 / len(value_cols)
 
-        ax.bar([i - width / 2 for i in points], features_df[old_col], width, label="Старая выборка", alpha=0.7, )
-        ax.bar([i + width / 2 for i in points], features_df[new_col], width, label="Новая выборка", alpha=0.7, )
+        for number, (value_col, value_label) in enumerate(zip(value_cols, value_labels)):
+            offset = (number - (len(value_cols) - 1) / 2) * width
+            ax.bar([i + offset for i in points], features_df[value_col], width, label=value_label, alpha=0.7, )
 
         ax.set_xlabel(x_label)
         ax.set_ylabel(y_label)
@@ -38,7 +47,57 @@ class PlotBuilder:
         ax.legend()
         ax.grid(True, alpha=0.3)
 
-        plt.tight_layout()
+        fig.tight_layout()
+
+        return fig
+
+    @staticmethod
+    def _plot_comparison_bars(
+        features_df: pd.DataFrame,
+        x_col: str,
+        old_col: str,
+        new_col: str,
+        title: str,
+        x_label: str,
+        y_label: str,
+    ) -> Figure:
+        """Вспомогательный метод для построения сравнительных графиков"""
+
+        return PlotBuilder._plot_grouped_bars(
+            features_df,
+            x_col,
+            [old_col, new_col],
+            ["Старая выборка", "Новая выборка"],
+            title,
+            x_label,
+            y_label,
+        )
+
+    @staticmethod
+    def _plot_heatmap(
+        features_df: pd.DataFrame,
+        x_col: str,
+        value_cols: list[str],
+        title: str,
+        x_label: str,
+        y_label: str,
+    ) -> Figure:
+        """Вспомогательный метод для построения тепловой карты: строка на выборку, колонка на диапазон"""
+
+        fig, ax = PlotBuilder._create_figure(figsize=(12, max(4, len(value_cols) * 0.4)))
+
+        image = ax.imshow(features_df[value_cols].to_numpy().T, aspect="auto", cmap="viridis")
+        fig.colorbar(image, ax=ax, label="Количество объектов")
+
+        ax.set_xlabel(x_label)
+        ax.set_ylabel(y_label)
+        ax.set_title(title)
+        ax.set_xticks(range(len(features_df)))
+        ax.set_xticklabels(features_df[x_col], rotation=45)
+        ax.set_yticks(range(len(value_cols)))
+        ax.set_yticklabels(value_cols)
+
+        fig.tight_layout()
 
         return fig
 
@@ -47,7 +106,7 @@ class PlotBuilder:
     def plot_monthly_activity(features_df: pd.DataFrame) -> Figure:
         """Создаёт график месячного количества активных объектов в разрезе комнатности"""
 
-        fig, ax = plt.subplots(figsize=(12, 8))
+        fig, ax = PlotBuilder._create_figure(figsize=(12, 8))
 
         features_df.plot(kind="line", ax=ax, marker="o")
         ax.set_title("Месячное количество активных объектов по комнатности")
@@ -55,8 +114,8 @@ class PlotBuilder:
         ax.set_ylabel("Количество объектов")
         ax.legend(title="Комнатность")
         ax.grid(True, alpha=0.3)
-        plt.xticks(rotation=45)
-        plt.tight_layout()
+        ax.tick_params(axis="x", labelrotation=45)
+        fig.tight_layout()
 
         logger.debug("График месячного количества активных объектов в разрезе комнатности")
 
@@ -114,3 +173,28 @@ class PlotBuilder:
         logger.debug("График сравнения распределения цен между выборками успешно создан")
 
         return fig
+
+    @exceptions_handler(logger=logger)
+    def plot_snapshots_comparison(
+        self,
+        features_df: pd.DataFrame,
+        x_col: str,
+        title: str,
+        x_label: str,
+        kind: str = "bars",
+    ) -> Figure:
+        """Создаёт график сравнения распределений N срезов данных сгруппированными столбцами или тепловой картой"""
+
+        value_cols = [column for column in features_df.columns if column != x_col]
+
+        if kind == "heatmap":
+            fig = self._plot_heatmap(features_df, x_col, value_cols, title, x_label, "Срез данных")
+
+        else:
+            fig = self._plot_grouped_bars(
+                features_df, x_col, value_cols, value_cols, title, x_label, "Количество объектов"
+            )
+
+        logger.debug("График сравнения распределений срезов данных успешно создан")
+
+        return fig
@@ -64,3 +64,15 @@ def temp_dir():
 
     with tempfile.TemporaryDirectory() as dir:
         yield Path(dir)
+
+
+@pytest.fixture(autouse=True)
+def isolated_results_cache(monkeypatch, tmp_path):
+    """Кэш результатов тестов во временной директории"""
+
+    from src.utils.cache import results_cache
+
+    monkeypatch.setattr(results_cache, "cache_dir", tmp_path / "cache")
+    results_cache.clear()
+    yield
+    results_cache.clear()
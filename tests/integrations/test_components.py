@@ -5,7 +5,11 @@ import pandas as pd
 from src.strategies.components import (
     load_old_data,
     prepare_data,
+    prepare_data_chunked,
     create_pivot_table,
+    create_snapshots_comparison_plots,
+    load_prepared_data,
+    merge_datasets_chunked,
     parsing_tdsk,
 )
 
@@ -35,6 +39,7 @@ class TestComponentsIntegration:
             raw_data=sample_raw_data,
             preprocessor=preprocessor_mock,
             csv_repository=csv_repo_mock,
+            columnar_repository=Mock(),
             save_args=Mock(
                 save_path="/test", file_name="test", save_date=False
             ),
@@ -44,6 +49,132 @@ class TestComponentsIntegration:
         preprocessor_mock.prepare_data.assert_called_once()
         csv_repo_mock.save.assert_called_once()
 
+    def test_prepare_old_data_columnar_storage(self, sample_raw_data):
+        csv_repo_mock = Mock()
+        columnar_repo_mock = Mock()
+
+        prepare_data(
+            raw_data=sample_raw_data,
+            preprocessor=Mock(),
+            csv_repository=csv_repo_mock,
+            columnar_repository=columnar_repo_mock,
+            save_args=Mock(save_path="/test", file_name="test", save_date=False, storage="columnar"),
+        )
+
+        columnar_repo_mock.save.assert_called_once()
+        csv_repo_mock.save.assert_not_called()
+
+    def test_prepare_data_chunked_integration(self, temp_dir, sample_raw_data):
+        from config import config
+        from src.adapters.csv_repository import CSVRepository
+        from src.processing.preprocessor import DataPreprocessor
+
+        raw = pd.concat([sample_raw_data] * 5, ignore_index=True)
+        raw.loc[2:, "gp"] = "ГП-1"
+        raw.to_csv(temp_dir / "raw_data.csv", sep="\t", index=False)
+
+        prepare_data_chunked(
+            raw_data_path=temp_dir / "raw_data",
+            preprocessor=DataPreprocessor(),
+            csv_repository=CSVRepository(),
+            save_args=config.SAVE_ARGS(temp_dir, "prepared_data", False),
+            chunk_size=2,
+        )
+
+        result = pd.read_csv(temp_dir / "prepared_data.csv")
+        expected = DataPreprocessor().prepare_data(raw.copy())
+
+        assert len(result) == len(raw)
+        assert result["gp"].tolist() == expected["gp"].tolist()
+        assert result["price"].tolist() == expected["price"].tolist()
+
+    def test_merge_datasets_chunked_reads_prepared_cache(self, temp_dir, sample_raw_data):
+        from config import config
+        from src.adapters.columnar_repository import ColumnarRepository
+        from src.adapters.csv_repository import CSVRepository
+        from src.adapters.prepared_data_cache import PreparedDataCache
+        from src.aggregation.aggregator import DataAggregator
+        from src.processing.preprocessor import DataPreprocessor
+
+        raw = pd.concat([sample_raw_data] * 3, ignore_index=True)
+        raw["advert_id"] = [1, 2, 3]
+        raw.to_csv(temp_dir / "raw_data.csv", sep="\t", index=False)
+
+        preprocessor = DataPreprocessor()
+        cache = PreparedDataCache(cache_path=temp_dir / "cache")
+
+        def run():
+            return load_prepared_data(
+                raw_data_path=temp_dir / "raw_data",
+                preprocessor=preprocessor,
+                csv_repository=CSVRepository(),
+                prepared_data_cache=cache,
+            )
+
+        expected = run()
+
+        with patch.object(preprocessor, "prepare_data") as prepare_mock:
+            prepared_old_data = run()
+            prepare_mock.assert_not_called()
+
+        new_data = prepared_old_data.iloc[[2]].assign(advert_id=4)
+
+        merge_datasets_chunked(
+            old_data_path=cache.data_path,
+            prepared_parsed_data=new_data,
+            aggregator=DataAggregator(),
+            csv_repository=CSVRepository(),
+            columnar_repository=ColumnarRepository(),
+            save_args=config.SAVE_ARGS(temp_dir, "merged_data", False),
+            chunk_size=2,
+            old_data_storage="columnar",
+        )
+
+        pd.testing.assert_frame_equal(prepared_old_data, expected)
+        assert pd.read_csv(temp_dir / "merged_data.csv")["advert_id"].tolist() == [1, 2, 3, 4]
+
+    def test_merge_datasets_chunked_waits_for_async_saves(self, temp_dir, sample_raw_data, monkeypatch):
+        import threading
+
+        from config import config
+        from src.adapters.columnar_repository import ColumnarRepository
+        from src.adapters.csv_repository import CSVRepository
+        from src.aggregation.aggregator import DataAggregator
+        from src.processing.preprocessor import DataPreprocessor
+        from src.utils.background_writer import background_writer
+
+        monkeypatch.setattr(config, "ASYNC_SAVES", True)
+
+        raw = pd.concat([sample_raw_data] * 3, ignore_index=True)
+        raw["advert_id"] = [1, 2, 3]
+
+        # Запись подготовленных данных задерживается, пока не начнётся сцепка
+        release = threading.Event()
+        background_writer.submit(release.wait, 5)
+
+        prepared_old_data = prepare_data(
+            raw_data=raw,
+            preprocessor=DataPreprocessor(),
+            csv_repository=CSVRepository(),
+            columnar_repository=ColumnarRepository(),
+            save_args=config.SAVE_ARGS(temp_dir, "prepared_data", False),
+        )
+
+        threading.Timer(0.2, release.set).start()
+
+        merge_datasets_chunked(
+            old_data_path=temp_dir / "prepared_data",
+            prepared_parsed_data=prepared_old_data.iloc[[2]].assign(advert_id=4),
+            aggregator=DataAggregator(),
+            csv_repository=CSVRepository(),
+            columnar_repository=ColumnarRepository(),
+            save_args=config.SAVE_ARGS(temp_dir, "merged_data", False),
+            chunk_size=2,
+        )
+        background_writer.flush()
+
+        assert pd.read_csv(temp_dir / "merged_data.csv")["advert_id"].tolist() == [1, 2, 3, 4]
+
     @patch("src.strategies.components.config")
     def test_create_pivot_table_integration(
         self, mock_config, sample_raw_data
@@ -88,6 +219,7 @@ class TestComponentsIntegration:
             parser=parser_mock,
             preprocessor=preprocessor_mock,
             csv_repository=csv_repo_mock,
+            columnar_repository=Mock(),
             save_args=Mock(
                 save_path="/test", file_name="test", save_date=False
             ),
@@ -97,3 +229,131 @@ class TestComponentsIntegration:
         parser_mock.parse_apartments.assert_called_once()
         preprocessor_mock.prepare_data.assert_called_once()
         csv_repo_mock.save.assert_called_once()
+
+    def test_parsing_tdsk_batches_integration(self, temp_dir, sample_parsed_data):
+        from config import config
+        from src.adapters.columnar_repository import ColumnarRepository
+        from src.adapters.csv_repository import CSVRepository
+        from src.processing.preprocessor import DataPreprocessor
+
+        parsed = pd.concat([sample_parsed_data] * 5, ignore_index=True)
+        parsed["advert_id"] = range(5)
+
+        parser_mock = Mock()
+        parser_mock.iter_apartments.return_value = (parsed.iloc[i:i + 2].copy() for i in range(0, 5, 2))
+
+        result = parsing_tdsk(
+            parser=parser_mock,
+            preprocessor=DataPreprocessor(),
+            csv_repository=CSVRepository(),
+            columnar_repository=ColumnarRepository(),
+            save_args=config.SAVE_ARGS(temp_dir, "tdsk", False),
+            batch_size=2,
+        )
+
+        parser_mock.iter_apartments.assert_called_once_with(batch_size=2)
+        parser_mock.parse_apartments.assert_not_called()
+        assert result["advert_id"].tolist() == list(range(5))
+        assert pd.read_csv(temp_dir / "tdsk.csv")["advert_id"].tolist() == list(range(5))
+
+    def test_parsing_tdsk_batches_matches_whole_table(self, temp_dir, sample_parsed_data):
+        from config import config
+        from src.adapters.columnar_repository import ColumnarRepository
+        from src.adapters.csv_repository import CSVRepository
+        from src.processing.preprocessor import DataPreprocessor
+
+        parsed = pd.concat([sample_parsed_data] * 40, ignore_index=True).astype(str)
+        parsed["advert_id"] = [str(number) for number in range(40)]
+        parsed["address"] = [f"ул. Петра Ершова, д. {number % 3}, ГП-7.{number % 2}" for number in range(40)]
+        parsed["gp"] = None
+
+        parser_mock = Mock()
+        parser_mock.parse_apartments.return_value = parsed.copy()
+        parser_mock.iter_apartments.return_value = (parsed.iloc[i:i + 4].copy() for i in range(0, 40, 4))
+
+        def run(batch_size):
+            return parsing_tdsk(
+                parser=parser_mock,
+                preprocessor=DataPreprocessor(compact=True),
+                csv_repository=CSVRepository(),
+                columnar_repository=ColumnarRepository(),
+                save_args=config.SAVE_ARGS(temp_dir, f"tdsk_{batch_size}", False),
+                batch_size=batch_size,
+            )
+
+        whole, batched = run(None), run(4)
+
+        assert isinstance(whole["address"].dtype, pd.CategoricalDtype)
+        assert batched.dtypes.equals(whole.dtypes)
+        pd.testing.assert_frame_equal(batched, whole)
+
+    def test_parsing_tdsk_batches_without_apartments(self, temp_dir):
+        from config import config
+        from src.adapters.columnar_repository import ColumnarRepository
+        from src.adapters.csv_repository import CSVRepository
+        from src.processing.preprocessor import DataPreprocessor
+
+        parser_mock = Mock()
+        parser_mock.iter_apartments.return_value = iter([])
+
+        result = parsing_tdsk(
+            parser=parser_mock,
+            preprocessor=DataPreprocessor(),
+            csv_repository=CSVRepository(),
+            columnar_repository=ColumnarRepository(),
+            save_args=config.SAVE_ARGS(temp_dir, "tdsk", False),
+            batch_size=4,
+        )
+
+        assert result.empty
+        assert list(result.columns) == config.BASE_COLUMNS
+        assert list(pd.read_csv(temp_dir / "tdsk.csv").columns) == config.BASE_COLUMNS
+
+    def test_create_snapshots_comparison_plots_without_snapshots(self):
+        plot_builder_mock = Mock()
+        png_repo_mock = Mock()
+
+        create_snapshots_comparison_plots(
+            snapshots={},
+            features_builder=Mock(),
+            plot_builder=plot_builder_mock,
+            png_repository=png_repo_mock,
+            save_args=Mock(save_path="/test", file_name="test", save_date=False),
+        )
+
+        plot_builder_mock.plot_snapshots_comparison.assert_not_called()
+        png_repo_mock.save.assert_not_called()
+
+    def test_create_pivot_table_rebuilds_store_when_old_data_changes(self, temp_dir, sample_raw_data):
+        from config import config
+        from src.adapters.csv_repository import CSVRepository
+        from src.aggregation.aggregator import DataAggregator
+        from src.aggregation.pivot_store import PivotStore
+        from src.processing.feature_engineering import FeaturesBuilder
+        from src.processing.preprocessor import DataPreprocessor
+
+        def run(old_data, store_path):
+            store_path.mkdir(exist_ok=True)
+            create_pivot_table(
+                prepared_old_data=old_data,
+                aggregator=DataAggregator(),
+                features_builder=FeaturesBuilder(),
+                csv_repository=CSVRepository(),
+                save_args=config.SAVE_ARGS(temp_dir, "pivot_table", False),
+                pivot_store=PivotStore(store_path=store_path, pivot_mode="actualized"),
+            )
+            return pd.read_csv(temp_dir / "pivot_table.csv")
+
+        old_data = DataPreprocessor().prepare_data(sample_raw_data.copy())
+        run(old_data, temp_dir / "store")
+
+        # Исправленная выгрузка: квартира актуальна дольше и относится к другому корпусу
+        corrected = old_data.copy()
+        corrected["gp"] = "ГП-2"
+        corrected["actualized_at"] = pd.Timestamp("2023-09-01", tz="UTC")
+
+        result = run(corrected, temp_dir / "store")
+        expected = run(corrected, temp_dir / "fresh_store")
+
+        pd.testing.assert_frame_equal(result, expected)
+        assert "ГП-2" in result["Корпус"].tolist()
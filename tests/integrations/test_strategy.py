@@ -20,6 +20,7 @@ class TestStrategiesIntegration:
         deps_mock.csv_repository.load.return_value = Mock()
         deps_mock.preprocessor.prepare_data.return_value = Mock()
         deps_mock.tdsk_parser.parse_apartments.return_value = Mock()
+        deps_mock.prepared_data_cache.load.return_value = None
 
         mock_setup_deps.return_value = deps_mock
 
@@ -30,6 +31,7 @@ class TestStrategiesIntegration:
             mock_config.OUTPUT_PLOTS = "/test/path"
             mock_config.PARSED_DATA_PATH = "/test/path"
             mock_config.MERGED_DATA_PATH = "/test/path"
+            mock_config.PARSER_BATCH_SIZE = None
             mock_config.SAVE_ARGS = Mock(
                 return_value=Mock(
                     save_path="/test/path", file_name="test", save_date=False
@@ -41,6 +43,7 @@ class TestStrategiesIntegration:
 
             assert deps_mock.csv_repository.load.called
             assert deps_mock.preprocessor.prepare_data.called
+            deps_mock.prepared_data_cache.save.assert_called_once()
 
     @patch("src.utils.dependency.setup_dependencies")
     def test_parse_strategy_execute(self, mock_setup_deps):
@@ -55,6 +58,7 @@ class TestStrategiesIntegration:
 
         with patch("src.strategies.strategies.config") as mock_config:
             mock_config.PARSED_DATA_PATH = "/test/path"
+            mock_config.PARSER_BATCH_SIZE = None
             mock_config.SAVE_ARGS = Mock(
                 return_value=Mock(
                     save_path="/test/path", file_name="test", save_date=False
@@ -1,7 +1,17 @@
+import os
+import threading
+
 import matplotlib.pyplot as plt
+import pandas as pd
 
+from config import config
+from src.adapters.columnar_repository import ColumnarRepository
 from src.adapters.csv_repository import CSVRepository
+from src.adapters.listing_repository import ListingRepository
+from src.adapters.prepared_data_cache import PreparedDataCache
 from src.adapters.png_repository import PNGRepository
+from src.visualization.plots import PlotBuilder
+from src.utils.background_writer import background_writer
 
 
 class TestCSVRepository:
@@ -43,6 +53,163 @@ class TestCSVRepository:
         files = list(save_path.glob("test_data_*.csv"))
         assert len(files) == 1
 
+    def test_async_save(self, temp_dir, sample_raw_data, monkeypatch):
+        monkeypatch.setattr(config, "ASYNC_SAVES", True)
+
+        CSVRepository().save(df=sample_raw_data, save_path=temp_dir, name="test_data", save_date=False)
+        background_writer.flush()
+
+        assert [file.name for file in temp_dir.iterdir()] == ["test_data.csv"]
+        assert len(pd.read_csv(temp_dir / "test_data.csv")) == len(sample_raw_data)
+
+    def test_save_and_load_chunks(self, temp_dir, sample_raw_data):
+        repo = CSVRepository()
+
+        df = pd.concat([sample_raw_data] * 5, ignore_index=True)
+        df["advert_id"] = range(5)
+
+        repo.save_chunks(
+            chunks=(df.iloc[i:i + 2] for i in range(0, len(df), 2)),
+            save_path=temp_dir,
+            name="test_chunks",
+            save_date=False,
+        )
+
+        chunks = list(
+            repo.load_chunks(
+                file_path=temp_dir / "test_chunks", separator=",", chunk_size=2
+            )
+        )
+
+        assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+        assert pd.concat(chunks)["advert_id"].tolist() == list(range(5))
+
+    def test_load_with_schema(self, temp_dir, sample_raw_data):
+        repo = CSVRepository()
+        sample_raw_data.to_csv(temp_dir / "raw.csv", sep="\t", index=False)
+
+        loaded = repo.load(file_path=temp_dir / "raw", separator="\t", schema=repo.make_schema())
+        assert loaded["gp"].dtype == object
+        assert pd.api.types.is_numeric_dtype(loaded["price"])
+
+        projected = repo.load(
+            file_path=temp_dir / "raw", separator="\t", schema=repo.make_schema(columns=["area", "price"])
+        )
+        assert list(projected.columns) == ["area", "price"]
+
+    def test_save_and_load_compressed(self, temp_dir, sample_raw_data):
+        repo = CSVRepository()
+        repo.save(df=sample_raw_data, save_path=temp_dir, name="plain_data")
+        expected = repo.load(file_path=temp_dir / "plain_data", separator=",")
+
+        repo.save(df=sample_raw_data, save_path=temp_dir, name="gzip_data", compression="gzip")
+        repo.save_chunks(
+            chunks=(sample_raw_data.iloc[i:i + 1] for i in range(len(sample_raw_data))),
+            save_path=temp_dir,
+            name="xz_data",
+            compression="xz",
+        )
+
+        assert (temp_dir / "gzip_data.csv.gz").read_bytes()[:2] == b"\x1f\x8b"
+        assert (temp_dir / "xz_data.csv.xz").exists()
+        assert CSVRepository.table_name(temp_dir / "xz_data.csv.xz") == "xz_data"
+
+        pd.testing.assert_frame_equal(repo.load(file_path=temp_dir / "gzip_data", separator=","), expected)
+        pd.testing.assert_frame_equal(
+            pd.concat(repo.load_chunks(file_path=temp_dir / "xz_data", separator=",", chunk_size=1)), expected
+        )
+
+
+class TestColumnarRepository:
+    def test_save_and_load_preserves_dtypes(self, temp_dir, sample_parsed_data):
+        repo = ColumnarRepository()
+
+        df = pd.concat([sample_parsed_data] * 3, ignore_index=True)
+        df["gp"] = df["gp"].astype("category")
+        df.loc[1, "address"] = float("nan")
+        df["area"] = df["area"].astype("float32")
+
+        repo.save(df=df, save_path=temp_dir, name="test_data", save_date=False)
+        loaded = repo.load(file_path=temp_dir / "test_data")
+
+        pd.testing.assert_frame_equal(loaded, df)
+
+        projected = repo.load(file_path=temp_dir / "test_data", columns=["price", "published_at"])
+        assert list(projected.columns) == ["price", "published_at"]
+        assert projected["published_at"].dt.tz is not None
+
+        chunks = list(repo.load_chunks(file_path=temp_dir / "test_data", chunk_size=2))
+        assert [len(chunk) for chunk in chunks] == [2, 1]
+        pd.testing.assert_frame_equal(pd.concat(chunks), df)
+
+    def test_save_and_load_nullable_dtypes(self, temp_dir):
+        repo = ColumnarRepository()
+
+        df = pd.DataFrame(
+            {
+                "room_count": pd.array([1, None, 3], dtype="Int64"),
+                "floor": pd.array([2, 5, None], dtype="Int16"),
+                "is_studio": pd.array([True, None, False], dtype="boolean"),
+            }
+        )
+
+        repo.save(df=df, save_path=temp_dir, name="nullable_data")
+
+        pd.testing.assert_frame_equal(repo.load(file_path=temp_dir / "nullable_data"), df)
+        pd.testing.assert_frame_equal(
+            pd.concat(repo.load_chunks(file_path=temp_dir / "nullable_data", chunk_size=2)), df
+        )
+
+
+class TestPreparedDataCache:
+    def test_fingerprint_invalidation(self, temp_dir, sample_parsed_data, monkeypatch):
+        raw_path = temp_dir / "raw"
+        sample_parsed_data.to_csv(f"{raw_path}.csv", index=False)
+
+        cache = PreparedDataCache(cache_path=temp_dir / "cache")
+        assert cache.load(raw_data_path=raw_path) is None
+
+        cache.save(raw_data_path=raw_path, prepared_data=sample_parsed_data)
+        pd.testing.assert_frame_equal(cache.load(raw_data_path=raw_path), sample_parsed_data)
+
+        # Время изменения другое, содержимое прежнее
+        os.utime(f"{raw_path}.csv", ns=(0, 0))
+        assert cache.load(raw_data_path=raw_path) is not None
+
+        monkeypatch.setattr(config, "COMPACT_DTYPES", not config.COMPACT_DTYPES)
+        assert cache.load(raw_data_path=raw_path) is None
+        monkeypatch.undo()
+
+        content = open(f"{raw_path}.csv", encoding="utf-8").read()
+        with open(f"{raw_path}.csv", "w", encoding="utf-8") as file:
+            file.write(content.replace("ГП-7.4", "ГП-7.5"))
+        assert cache.load(raw_data_path=raw_path) is None
+
+
+class TestListingRepository:
+    def test_upsert_and_load(self, temp_dir, sample_parsed_data):
+        repo = ListingRepository(db_path=temp_dir / "listings.db")
+        assert repo.is_empty()
+
+        old_data = pd.concat([sample_parsed_data] * 2, ignore_index=True)
+        old_data["advert_id"] = [1, 2]
+        old_data["actualized_at"] = pd.Timestamp("2023-08-01", tz="UTC")
+
+        new_data = pd.concat([sample_parsed_data] * 2, ignore_index=True)
+        new_data["advert_id"] = [2, 3]
+        new_data["actualized_at"] = pd.Timestamp("2023-09-01", tz="UTC")
+
+        repo.upsert(old_data)
+        repo.upsert(new_data)
+
+        result = repo.load()
+
+        assert not repo.is_empty()
+        assert result["advert_id"].tolist() == [1, 2, 3]
+        assert result["actualized_at"].dt.month.tolist() == [8, 9, 9]
+        assert result["gp"].tolist() == ["ГП-7.4"] * 3
+        assert pd.api.types.is_datetime64_any_dtype(result["published_at"])
+
 
 class TestPNGRepository:
     def test_save_figure(self, temp_dir):
@@ -61,3 +228,39 @@ class TestPNGRepository:
         assert saved_file.exists()
 
         plt.close(fig)
+
+    def test_async_save_closes_figure(self, temp_dir, monkeypatch):
+        monkeypatch.setattr(config, "ASYNC_SAVES", True)
+
+        fig, ax = plt.subplots()
+        ax.plot([1, 2, 3], [1, 2, 3])
+
+        PNGRepository().save(fig=fig, save_path=temp_dir, name="test_plot", save_date=False)
+
+        assert not plt.fignum_exists(fig.number)
+
+        background_writer.flush()
+
+        assert [file.name for file in temp_dir.iterdir()] == ["test_plot.png"]
+        assert (temp_dir / "test_plot.png").read_bytes()[:8] == b"\x89PNG\r\n\x1a\n"
+
+    def test_async_save_renders_builder_figure_on_writer(self, temp_dir, monkeypatch):
+        monkeypatch.setattr(config, "ASYNC_SAVES", True)
+
+        threads = []
+        render = PNGRepository._render
+
+        def record_render(fig):
+            threads.append(threading.current_thread().name)
+            return render(fig)
+
+        monkeypatch.setattr(PNGRepository, "_render", staticmethod(record_render))
+
+        features = pd.DataFrame({"room_type": ["1-комн.", "2-комн."], "old_count": [1, 2], "new_count": [2, 1]})
+        fig = PlotBuilder().plot_room_comparison(features_df=features)
+
+        PNGRepository().save(fig=fig, save_path=temp_dir, name="test_plot", save_date=False)
+        background_writer.flush()
+
+        assert threads[0].startswith("background-writer")
+        assert (temp_dir / "test_plot.png").read_bytes()[:8] == b"\x89PNG\r\n\x1a\n"
@@ -1,6 +1,9 @@
 import pandas as pd
 
 from src.aggregation.aggregator import DataAggregator
+from src.aggregation.cube import CubeBuilder
+from src.aggregation.pivot_store import PivotStore
+from src.processing.feature_engineering import FeaturesBuilder
 
 
 class TestDataAggregator:
@@ -21,6 +24,55 @@ class TestDataAggregator:
         assert "Корпус" in result.columns
         assert "Кол-во активных квартир" in result.columns
 
+    def test_create_active_objects_pivot_is_year_aware(self, sample_raw_data):
+        aggregator = DataAggregator()
+
+        df = pd.concat([sample_raw_data] * 3, ignore_index=True)
+        df["actualized_at"] = pd.to_datetime(
+            [
+                "2023-08-01 10:00:00+00:00",
+                "2023-08-01 23:59:59+00:00",
+                "2024-08-01 10:00:00+00:00",
+            ]
+        )
+        df["gp"] = "ГП-1"
+
+        dates_df = pd.DataFrame(
+            {"date": pd.date_range("2023-07-30", "2023-08-02", tz="UTC")}
+        )
+
+        result = aggregator.create_active_objects_pivot(df, dates_df)
+
+        assert result["Дата"].tolist() == ["01.08.2023"]
+        assert result["Кол-во активных квартир"].tolist() == [2]
+
+    def test_create_interval_objects_pivot(self, sample_raw_data):
+        aggregator = DataAggregator()
+
+        df = pd.concat([sample_raw_data] * 2, ignore_index=True)
+        df["published_at"] = pd.to_datetime(
+            ["2023-08-01 10:00:00+00:00", "2023-08-02 10:00:00+00:00"]
+        )
+        df["actualized_at"] = pd.to_datetime(
+            ["2023-08-03 10:00:00+00:00", "2023-08-02 12:00:00+00:00"]
+        )
+        df["gp"] = ["ГП-1", "ГП-2"]
+
+        dates_df = pd.DataFrame(
+            {"date": pd.date_range("2023-07-31", "2023-08-04", tz="UTC")}
+        )
+
+        result = aggregator.create_interval_objects_pivot(df, dates_df)
+
+        assert result["Дата"].tolist() == [
+            "01.08.2023",
+            "02.08.2023",
+            "02.08.2023",
+            "03.08.2023",
+        ]
+        assert result["Корпус"].tolist() == ["ГП-1", "ГП-1", "ГП-2", "ГП-1"]
+        assert result["Кол-во активных квартир"].tolist() == [1, 1, 1, 1]
+
     def test_saturate_old_data(self, sample_raw_data, sample_parsed_data):
         aggregator = DataAggregator()
 
@@ -36,3 +88,96 @@ class TestDataAggregator:
         if advert_id in sample_raw_data["advert_id"].values:
             updated_row = result[result["advert_id"] == advert_id]
             assert not updated_row.empty
+
+    def test_saturate_old_data_chunks(self, sample_raw_data, sample_parsed_data):
+        aggregator = DataAggregator()
+
+        old_data = pd.concat([sample_raw_data] * 3, ignore_index=True)
+        old_data["advert_id"] = [1, 2, 3]
+
+        new_data = pd.concat([sample_parsed_data] * 2, ignore_index=True)
+        new_data["advert_id"] = [3, 4]
+
+        expected = aggregator.saturate_old_data(old_data, new_data)
+
+        old_chunks = (old_data.iloc[i:i + 2].copy() for i in range(0, len(old_data), 2))
+        result = pd.concat(
+            aggregator.saturate_old_data_chunks(old_chunks, new_data),
+            ignore_index=True,
+        )
+
+        pd.testing.assert_frame_equal(result, expected)
+
+
+class TestPivotStore:
+    def test_apply_snapshot_matches_full_recompute(
+        self, temp_dir, sample_raw_data, sample_parsed_data
+    ):
+        old_data = pd.concat([sample_raw_data] * 2, ignore_index=True)
+        old_data["advert_id"] = [1, 2]
+        old_data["gp"] = "ГП-1"
+        for column in ["published_at", "actualized_at"]:
+            old_data[column] = pd.to_datetime(old_data[column])
+
+        new_data = pd.concat([sample_parsed_data] * 2, ignore_index=True)
+        new_data["advert_id"] = [2, 3]
+        new_data["actualized_at"] = pd.Timestamp("2023-08-03", tz="UTC")
+
+        dates_df = pd.DataFrame(
+            {"date": pd.date_range("2023-08-01", "2023-08-05", tz="UTC")}
+        )
+
+        store = PivotStore(store_path=temp_dir, pivot_mode="actualized")
+        store.build(old_data)
+        store.save()
+
+        loaded_store = PivotStore(store_path=temp_dir, pivot_mode="actualized")
+        assert loaded_store.exists()
+        loaded_store.load()
+        loaded_store.apply_snapshot(new_data)
+
+        expected = DataAggregator.create_active_objects_pivot(
+            DataAggregator.saturate_old_data(old_data, new_data), dates_df
+        )
+
+        pd.testing.assert_frame_equal(loaded_store.to_pivot(dates_df), expected)
+
+
+class TestCubeBuilder:
+    def test_cube_rollups_match_direct_features(
+        self, sample_raw_data, sample_parsed_data
+    ):
+        old_data = pd.concat([sample_raw_data] * 3, ignore_index=True)
+        old_data["gp"] = ["ГП-1", "ГП-1", "ГП-2"]
+        old_data["area"] = [25.0, 39.4, 120.0]
+        old_data["actualized_at"] = pd.to_datetime(old_data["actualized_at"])
+
+        new_data = sample_parsed_data.copy()
+
+        old_cube = CubeBuilder.build_cube(old_data)
+        new_cube = CubeBuilder.build_cube(new_data)
+
+        dates_df = pd.DataFrame(
+            {"date": pd.date_range("2023-07-01", "2023-08-31", tz="UTC")}
+        )
+
+        pd.testing.assert_frame_equal(
+            DataAggregator.create_active_objects_pivot_from_cube(old_cube, dates_df),
+            DataAggregator.create_active_objects_pivot(old_data, dates_df),
+        )
+        pd.testing.assert_frame_equal(
+            FeaturesBuilder.create_monthly_activity_features_from_cube(old_cube),
+            FeaturesBuilder.create_monthly_activity_features(old_data),
+        )
+        pd.testing.assert_frame_equal(
+            FeaturesBuilder.create_room_comparison_features_from_cubes(old_cube, new_cube),
+            FeaturesBuilder.create_room_comparison_features(old_data, new_data),
+        )
+        pd.testing.assert_frame_equal(
+            FeaturesBuilder.create_area_comparison_features_from_cubes(old_cube, new_cube),
+            FeaturesBuilder.create_area_comparison_features(old_data, new_data),
+        )
+        pd.testing.assert_frame_equal(
+            FeaturesBuilder.create_price_comparison_features_from_cubes(old_cube, new_cube),
+            FeaturesBuilder.create_price_comparison_features(old_data, new_data),
+        )
@@ -1,5 +1,7 @@
+import time
 from unittest.mock import Mock, patch
 
+import pandas as pd
 import pytest
 
 from src.parsing.argsparser import setup_argsparser, create_global_parser
@@ -70,3 +72,85 @@ class TestTDSKParser:
         with pytest.raises(ValueError) as exc_info:
             parser.parse_apartments()
             assert "неудалось" in str(exc_info)
+
+    @pytest.mark.parametrize("max_in_flight, parse_workers", [(1, 1), (3, 1), (3, 2)])
+    def test_parse_apartments_keeps_page_order(self, max_in_flight, parse_workers, monkeypatch):
+        from config import config
+
+        monkeypatch.setattr(config, "PARSER_MAX_IN_FLIGHT", max_in_flight)
+        monkeypatch.setattr(config, "PARSER_PARSE_WORKERS", parse_workers)
+
+        def page_html(page):
+            items = "".join(
+                f"""
+                <div class="search-result__list-item list-item">
+                    <a class="search-result__link" data-id="{page * 10 + i}" data-floor="5" data-rooms="2"
+                       data-number="101" data-price="5 000 000"></a>
+                    <div class="search-result__object-bottom">ул. Тестовая, д. 1</div>
+                    <div class="search-result__td square">45,5</div>
+                    <div class="search-result__object-top">2-комнатная квартира</div>
+                    <div class="search-result__td">Подъезд 1</div>
+                    <div class="search-result__td">Доп информация</div>
+                </div>
+                """
+                for i in range(2)
+            )
+            return f'<html><span class="search-result__count-value">7</span>{items}</html>'
+
+        def get(url, params=None):
+            # Последние страницы отвечают быстрее первых, порядок результата от этого не зависит
+            page = int(params["PAGEN_3"]) if params else 1
+            time.sleep(0.01 * (5 - min(page, 4)))
+            return Mock(text=page_html(min(page, 4)))
+
+        parser = TDSKParser()
+        parser.session = Mock(get=Mock(side_effect=get))
+
+        result = parser.parse_apartments()
+
+        # 7 квартир по 2 на странице: четвёртая страница превышает количество квартир и отбрасывается
+        assert result["advert_id"].tolist() == ["10", "11", "20", "21", "30", "31"]
+
+        batches = list(parser.iter_apartments(batch_size=4))
+        assert [len(batch) for batch in batches] == [4, 2]
+        assert pd.concat(batches)["advert_id"].tolist() == result["advert_id"].tolist()
+
+    def test_parse_pool_does_not_fork_threads(self):
+        # Процессы разбора создаются, когда уже работают потоки загрузки и фоновой записи
+        assert TDSKParser._parse_context().get_start_method() in ("forkserver", "spawn")
+
+    @pytest.mark.parametrize("fast_html", [True, False])
+    def test_find_apartments_fast_path_matches_full_tree(self, fast_html, monkeypatch):
+        from config import config
+
+        monkeypatch.setattr(config, "PARSER_FAST_HTML", fast_html)
+
+        def item(advert_id, action=False):
+            classes = "search-result__list-item search-result__list-item--action list-item" if action else (
+                "search-result__list-item list-item"
+            )
+            return f"""
+            <div class="{classes}">
+                <div class="search-result__object-top">1-комнатная <b>квартира</b></div>
+                <div class="search-result__object-bottom">ул. Петра Ершова, д. 9, ГП-7.4</div>
+                <a class="search-result__link" data-id="{advert_id}" data-floor="14" data-rooms="1"
+                   data-number="275" data-price="4 150 000"><img src="/plan.png"></a>
+                <div class="search-result__td square">41,1</div>
+                <div class="search-result__td">Подъезд&nbsp;5</div>
+            </div>
+            """
+
+        html = (
+            '<html><head><script>var items = "search-result__list-item";</script></head><body>'
+            '<ul class="menu"><li><a href="/">Главная</a></ul>'
+            f'<div class="search-result__list">{item(1)}{item(2, action=True)}{item(3)}</div>'
+            '<footer><p>Контакты</footer></body></html>'
+        )
+
+        records = [TDSKParser._parse_apartments_element(apartment) for apartment in TDSKParser._find_apartments(html)]
+
+        # Акционные квартиры идут первыми, как и при разборе полного дерева
+        assert [record["advert_id"] for record in records] == ["2", "1", "3"]
+        assert records[0]["description"] == "1-комнатная квартира ул. Петра Ершова, д. 9, ГП-7.4"
+        assert records[0]["entrance_number"] == "Подъезд\xa05"
+        assert records[0]["area"] == "41.1"
@@ -1,6 +1,10 @@
+import numpy as np
 import pandas as pd
+import pytest
 
+from config import config
 from src.processing.feature_engineering import FeaturesBuilder
+from src.processing.histogram import Histogram
 from src.processing.preprocessor import DataPreprocessor
 
 
@@ -42,6 +46,72 @@ class TestDataPreprocessor:
         result = preprocessor._extract_gp_from_address(address_without)
         assert result is None
 
+    def test_extract_gp_from_addresses(self):
+        addresses = pd.Series(
+            [
+                "ул. Петра Ершова, д. 9, ГП-7.4",
+                "ул. Монтажников, д. 40, подъезд 2",
+                "просто адрес",
+                "ул. Петра Ершова, д. 9, ГП-7.4",
+                "ул. Тимирязева, д.12а",
+            ],
+            index=[10, 11, 12, 13, 14],
+        )
+
+        result = DataPreprocessor._extract_gp_from_addresses(addresses)
+
+        assert result.index.tolist() == addresses.index.tolist()
+        assert result.tolist()[:2] == ["ГП-7.4", "Дом 40"]
+        assert pd.isna(result[12])
+        assert result.tolist()[3:] == ["ГП-7.4", "Дом 12а"]
+
+    def test_prepare_data_compact_dtypes(self, sample_raw_data):
+        sample = pd.concat([sample_raw_data] * 4, ignore_index=True)
+
+        result = DataPreprocessor(compact=True).prepare_data(sample.copy())
+        expected = DataPreprocessor(compact=False).prepare_data(sample.copy())
+
+        assert isinstance(result["gp"].dtype, pd.CategoricalDtype)
+        assert isinstance(result["address"].dtype, pd.CategoricalDtype)
+        assert result["room_count"].dtype == np.int8
+        pd.testing.assert_series_equal(result["area"], expected["area"])
+        assert result["price"].dtype == expected["price"].dtype
+        assert result.memory_usage(deep=True).sum() < expected.memory_usage(deep=True).sum()
+        pd.testing.assert_frame_equal(
+            result.astype({"gp": object, "address": object})[["gp", "address"]],
+            expected[["gp", "address"]],
+        )
+
+    def test_prepare_data_workers_match_serial(self, monkeypatch, sample_raw_data, sample_parsed_data):
+        monkeypatch.setattr(config, "PREPROCESSING_MIN_PARTITION_ROWS", 1)
+        sample = pd.concat([sample_raw_data, sample_parsed_data] * 3, ignore_index=True)
+
+        expected = DataPreprocessor(workers=1).prepare_data(sample.copy())
+        result = DataPreprocessor(workers=2).prepare_data(sample.copy())
+        pd.testing.assert_frame_equal(result, expected)
+
+        chunks = [sample.iloc[:4].copy(), sample.iloc[4:].copy()]
+        streamed = pd.concat(DataPreprocessor(workers=2).iter_prepare_data(chunks))
+        pd.testing.assert_frame_equal(streamed, expected)
+
+    def test_cast_dates_mixed_formats(self):
+        df = pd.DataFrame(
+            {
+                "published_at": [
+                    "2023-07-01 10:00:00.123456+00:00",
+                    "2023-07-01 10:00:00+00:00",
+                    None,
+                    "2023-07-02",
+                    "2023-07-01 10:00:00.123456+00:00",
+                ]
+            }
+        )
+
+        result = DataPreprocessor._cast_dates(df.copy(), ["published_at"])
+        expected = pd.to_datetime(df["published_at"], format="mixed", utc=True)
+
+        pd.testing.assert_series_equal(result["published_at"], expected)
+
 
 class TestFeaturesBuilder:
     def test_create_date_range(self):
@@ -65,6 +135,26 @@ class TestFeaturesBuilder:
         assert result is not None
         assert "1-комн." in result.columns
 
+    def test_create_monthly_activity_features_values(self, sample_raw_data):
+        builder = FeaturesBuilder()
+
+        df = pd.concat([sample_raw_data] * 3, ignore_index=True)
+        df["actualized_at"] = pd.to_datetime(
+            [
+                "2023-07-15 00:00:00+00:00",
+                "2023-08-01 00:00:00+00:00",
+                "2024-08-01 00:00:00+00:00",
+            ]
+        )
+        df["room_count"] = [1, 2, 1]
+
+        result = builder.create_monthly_activity_features(df)
+
+        assert result.index.astype(str).tolist() == ["2023-07", "2023-08", "2024-08"]
+        assert result.columns.tolist() == ["1-комн.", "2-комн."]
+        assert result["1-комн."].tolist() == [1.0, 0.0, 1.0]
+        assert result["2-комн."].tolist() == [0.0, 1.0, 0.0]
+
     def test_create_room_comparison_features(
         self, sample_raw_data, sample_parsed_data
     ):
@@ -104,3 +194,77 @@ class TestFeaturesBuilder:
         assert "price_range" in result.columns
         assert "old_count" in result.columns
         assert "new_count" in result.columns
+
+    def test_create_snapshots_features(
+        self, sample_raw_data, sample_parsed_data
+    ):
+        builder = FeaturesBuilder()
+
+        snapshots = {
+            "first": sample_raw_data,
+            "second": sample_parsed_data,
+            "third": pd.concat([sample_raw_data, sample_parsed_data]),
+        }
+
+        rooms = builder.create_snapshots_room_features(snapshots)
+        areas = builder.create_snapshots_area_features(snapshots)
+        prices = builder.create_snapshots_price_features(snapshots)
+
+        assert rooms.columns.tolist() == ["room_type", "first", "second", "third"]
+        assert rooms["third"].sum() == 2
+        assert areas["area_range"].tolist() == config.AREA_LABELS
+        assert prices["price_range"].tolist() == config.PRICE_LABELS
+
+        comparison = builder.create_area_comparison_features(
+            sample_raw_data, sample_parsed_data
+        )
+        assert areas["first"].tolist() == comparison["old_count"].tolist()
+        assert areas["second"].tolist() == comparison["new_count"].tolist()
+
+    def test_create_snapshots_features_edge_cases(self, sample_raw_data, sample_parsed_data):
+        builder = FeaturesBuilder()
+
+        assert builder.create_snapshots_room_features({}).columns.tolist() == ["room_type"]
+        assert builder.create_snapshots_area_features({})["area_range"].tolist() == config.AREA_LABELS
+        assert builder.create_snapshots_price_features({})["price_range"].tolist() == config.PRICE_LABELS
+
+        # Пропуск комнатности в одном срезе переводит колонку во float, подписи остаются целыми
+        with_missing = sample_parsed_data.assign(room_count=[np.nan])
+        rooms = builder.create_snapshots_room_features({"first": sample_raw_data, "second": with_missing})
+
+        assert rooms["room_type"].tolist() == ["1-комн."]
+        assert rooms["first"].tolist() == [1]
+        assert rooms["second"].tolist() == [0]
+
+
+class TestHistogram:
+    def test_value_counts_matches_cut(self):
+        values = pd.Series(
+            [-1, 0, 19.99, 20, 39.4, 99.99, 100, 250, float("inf"), np.nan]
+        )
+        histogram = Histogram(config.AREA_RANGES, config.AREA_LABELS, name="area")
+
+        (result,) = histogram.value_counts(values)
+        expected = (
+            pd.cut(
+                values.rename("area"),
+                bins=config.AREA_RANGES,
+                labels=config.AREA_LABELS,
+                right=False,
+            )
+            .value_counts()
+            .sort_index()
+        )
+
+        pd.testing.assert_series_equal(result, expected)
+
+    def test_count_many_samples(self):
+        histogram = Histogram([0, 10, 20], ["<10", "10-20"])
+
+        result = histogram.count([1, 5, 15], [10], [25, np.nan])
+
+        assert result.tolist() == [[2, 1], [0, 1], [0, 0]]
+
+    def test_invalid_bins(self):
+        with pytest.raises(ValueError):
+            Histogram([0, 20, 10], ["a", "b"])
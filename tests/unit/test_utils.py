@@ -2,10 +2,14 @@ import pytest
 from unittest.mock import Mock, patch
 import logging
 
+import pandas as pd
+
 from src.utils.cleaner import clear_folder
 from src.utils.dependency import setup_dependencies
-from src.utils.exceptions import DependencyError, StrategyError
-from src.utils.decorators import strategy_timer
+from src.utils.exceptions import DependencyError, StrategyError, WriterError
+from src.utils.decorators import strategy_timer, memoize
+from src.utils.cache import ResultCache
+from src.utils.background_writer import BackgroundWriter
 
 
 class TestCleaner:
@@ -70,3 +74,95 @@ class TestDecorators:
             "успешно выполнилась" in record.message
             for record in caplog.records
         )
+
+
+class TestResultCache:
+    def test_memoize_keys_by_content(self, temp_dir):
+        cache = ResultCache(cache_dir=temp_dir, memory_limit=2**20, disk_limit=2**20, enabled=True)
+        calls = []
+
+        @memoize(cache)
+        def total(df: pd.DataFrame, column: str = "value") -> pd.DataFrame:
+            calls.append(1)
+            return df[[column]].sum().to_frame()
+
+        df = pd.DataFrame({"value": [1, 2, 3]})
+
+        first = total(df)
+        first.iloc[0, 0] = -1
+        second = total(df.copy(), column="value")
+
+        assert len(calls) == 1
+        assert second.iloc[0, 0] == 6
+        assert (cache.hits, cache.misses) == (1, 1)
+
+        total(df.assign(value=[1, 2, 4]))
+        assert len(calls) == 2
+
+    def test_memoize_keys_by_dependency_source(self, temp_dir, monkeypatch):
+        import importlib
+
+        (temp_dir / "memoize_dependency.py").write_text("SCALE = 1\n", encoding="utf-8")
+        monkeypatch.syspath_prepend(str(temp_dir))
+        dependency = importlib.import_module("memoize_dependency")
+        calls = []
+
+        def scale(value: int) -> int:
+            calls.append(value)
+            return value * dependency.SCALE
+
+        cache = ResultCache(cache_dir=temp_dir / "cache", memory_limit=2**20, disk_limit=2**20, enabled=True)
+        assert memoize(cache, depends=[dependency])(scale)(2) == 2
+
+        # Изменённый код зависимости после перезапуска не должен давать результат из дискового кэша
+        (temp_dir / "memoize_dependency.py").write_text("SCALE = 10\n", encoding="utf-8")
+        importlib.reload(dependency)
+        restored = ResultCache(cache_dir=temp_dir / "cache", memory_limit=2**20, disk_limit=2**20, enabled=True)
+
+        assert memoize(restored, depends=[dependency])(scale)(2) == 20
+        assert len(calls) == 2
+
+    def test_disk_tier_and_eviction(self, temp_dir):
+        cache = ResultCache(cache_dir=temp_dir, memory_limit=2**20, disk_limit=2**20, enabled=True)
+        cache.put("key", pd.Series([1, 2, 3]))
+
+        restored = ResultCache(cache_dir=temp_dir, memory_limit=2**20, disk_limit=2**20, enabled=True)
+        found, value = restored.get("key")
+        assert found
+        assert value.tolist() == [1, 2, 3]
+
+        small = ResultCache(cache_dir=temp_dir / "small", memory_limit=600, disk_limit=600, enabled=True)
+        for key in ["a", "b", "c"]:
+            small.put(key, bytes(250))
+
+        files = list((temp_dir / "small").glob("*.pkl"))
+        assert len(files) == 2
+        assert sum(file.stat().st_size for file in files) <= 600
+        assert small.get("c")[0]
+
+
+class TestBackgroundWriter:
+    def test_flush_waits_for_writes(self):
+        writer = BackgroundWriter(workers=2, queue_size=1)
+        written = []
+
+        for number in range(5):
+            writer.submit(written.append, number)
+
+        writer.flush()
+
+        assert sorted(written) == list(range(5))
+
+    def test_flush_reports_errors(self):
+        writer = BackgroundWriter(workers=1, queue_size=2)
+
+        def fail():
+            raise OSError("диск заполнен")
+
+        writer.submit(fail)
+
+        with pytest.raises(WriterError) as exc_info:
+            writer.flush()
+
+        assert isinstance(exc_info.value.__cause__, OSError)
+        writer.flush()
@@ -69,3 +69,23 @@ class TestPlotBuilder:
 
         assert isinstance(fig, plt.Figure)
         plt.close(fig)
+
+    def test_plot_snapshots_comparison(self):
+        builder = PlotBuilder()
+
+        features_df = pd.DataFrame(
+            {
+                "price_range": ["<4млн", "4-5млн", "5-6млн"],
+                "first": [3, 7, 5],
+                "second": [4, 8, 6],
+                "third": [5, 9, 7],
+            }
+        )
+
+        for kind in ["bars", "heatmap"]:
+            fig = builder.plot_snapshots_comparison(
+                features_df, "price_range", "Заголовок", "Диапазон", kind=kind
+            )
+
+            assert isinstance(fig, plt.Figure)
+            plt.close(fig)